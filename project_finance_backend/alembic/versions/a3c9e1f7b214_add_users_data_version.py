@@ -0,0 +1,30 @@
+"""add data_version to users
+
+Revision ID: a3c9e1f7b214
+Revises: f2b6c8d14a90
+Create Date: 2026-10-16 16:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a3c9e1f7b214"
+down_revision: Union[str, Sequence[str], None] = "f2b6c8d14a90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column("data_version", sa.BigInteger(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "data_version")
@@ -0,0 +1,74 @@
+"""add transaction filter and search indexes
+
+Revision ID: b8d4f0a2c6e3
+Revises: a3c9e1f7b214
+Create Date: 2026-10-16 17:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b8d4f0a2c6e3"
+down_revision: Union[str, Sequence[str], None] = "a3c9e1f7b214"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # Как и в c41d7a9e2f10: CONCURRENTLY, чтобы не блокировать запись
+    with op.get_context().autocommit_block():
+        # GET /transactions/?category_id=...
+        op.create_index(
+            "ix_transactions_user_id_category_id_created_at",
+            "transactions",
+            ["user_id", "category_id", sa.text("created_at DESC")],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # GET /transactions/?transaction_type=...
+        op.create_index(
+            "ix_transactions_user_id_transaction_type_created_at",
+            "transactions",
+            ["user_id", "transaction_type", sa.text("created_at DESC")],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # GET /transactions/?q=... (description ILIKE '%q%')
+        op.create_index(
+            "ix_transactions_description_trgm",
+            "transactions",
+            ["description"],
+            postgresql_using="gin",
+            postgresql_ops={"description": "gin_trgm_ops"},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_transactions_description_trgm",
+            table_name="transactions",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_transactions_user_id_transaction_type_created_at",
+            table_name="transactions",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_transactions_user_id_category_id_created_at",
+            table_name="transactions",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,75 @@
+"""add hot path indexes for transactions
+
+Revision ID: c41d7a9e2f10
+Revises: add_color_icon
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c41d7a9e2f10"
+down_revision: Union[str, Sequence[str], None] = "add_color_icon"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции,
+    # зато таблица не блокируется на запись, пока строится индекс
+    with op.get_context().autocommit_block():
+        # Список транзакций пользователя: WHERE user_id = ? ORDER BY created_at DESC
+        # (покрывает и FK transactions.user_id)
+        op.create_index(
+            "ix_transactions_user_id_created_at",
+            "transactions",
+            ["user_id", sa.text("created_at DESC"), sa.text("id DESC")],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # /stats и /profile: агрегаты за период читаются index-only scan
+        op.create_index(
+            "ix_transactions_user_id_created_at_covering",
+            "transactions",
+            ["user_id", "created_at"],
+            postgresql_include=["amount", "transaction_type"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # ON DELETE CASCADE из categories
+        op.create_index(
+            "ix_transactions_category_id",
+            "transactions",
+            ["category_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # categories.user_id уже покрыт уникальным индексом uq_user_category_name
+        # (user_id, name), отдельный индекс не нужен
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_transactions_category_id",
+            table_name="transactions",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_transactions_user_id_created_at_covering",
+            table_name="transactions",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_transactions_user_id_created_at",
+            table_name="transactions",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
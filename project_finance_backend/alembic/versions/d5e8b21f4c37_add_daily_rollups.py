@@ -0,0 +1,58 @@
+"""add daily_rollups table
+
+Revision ID: d5e8b21f4c37
+Revises: c41d7a9e2f10
+Create Date: 2026-10-16 13:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "d5e8b21f4c37"
+down_revision: Union[str, Sequence[str], None] = "c41d7a9e2f10"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "daily_rollups",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("category_id", sa.Integer(), nullable=False),
+        sa.Column("income", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("expense", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("income_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("expense_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["category_id"], ["categories.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "day", "category_id"),
+    )
+    op.create_index("ix_daily_rollups_category_id", "daily_rollups", ["category_id"])
+
+    # Заполняем по уже существующим транзакциям
+    op.execute(
+        """
+        INSERT INTO daily_rollups
+            (user_id, day, category_id, income, expense, income_count, expense_count)
+        SELECT
+            user_id,
+            created_at::date,
+            category_id,
+            COALESCE(SUM(amount) FILTER (WHERE transaction_type = 'INCOME'), 0),
+            COALESCE(SUM(amount) FILTER (WHERE transaction_type = 'EXPENSE'), 0),
+            COUNT(*) FILTER (WHERE transaction_type = 'INCOME'),
+            COUNT(*) FILTER (WHERE transaction_type = 'EXPENSE')
+        FROM transactions
+        GROUP BY user_id, created_at::date, category_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_daily_rollups_category_id", table_name="daily_rollups")
+    op.drop_table("daily_rollups")
@@ -0,0 +1,69 @@
+"""add lifetime totals to users
+
+Revision ID: e7f3a9c05b62
+Revises: d5e8b21f4c37
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e7f3a9c05b62"
+down_revision: Union[str, Sequence[str], None] = "d5e8b21f4c37"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column("total_income", sa.Float(), nullable=False, server_default="0"),
+    )
+    op.add_column(
+        "users",
+        sa.Column("total_expense", sa.Float(), nullable=False, server_default="0"),
+    )
+    op.add_column(
+        "users",
+        sa.Column("income_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column(
+        "users",
+        sa.Column("expense_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+    # Заполняем по уже существующим транзакциям
+    op.execute(
+        """
+        UPDATE users u SET
+            total_income = s.total_income,
+            total_expense = s.total_expense,
+            income_count = s.income_count,
+            expense_count = s.expense_count
+        FROM (
+            SELECT
+                user_id,
+                COALESCE(SUM(amount) FILTER (WHERE transaction_type = 'INCOME'), 0)
+                    AS total_income,
+                COALESCE(SUM(amount) FILTER (WHERE transaction_type = 'EXPENSE'), 0)
+                    AS total_expense,
+                COUNT(*) FILTER (WHERE transaction_type = 'INCOME') AS income_count,
+                COUNT(*) FILTER (WHERE transaction_type = 'EXPENSE') AS expense_count
+            FROM transactions
+            GROUP BY user_id
+        ) s
+        WHERE u.id = s.user_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "expense_count")
+    op.drop_column("users", "income_count")
+    op.drop_column("users", "total_expense")
+    op.drop_column("users", "total_income")
@@ -0,0 +1,39 @@
+"""add telegram_id to users
+
+Revision ID: f2b6c8d14a90
+Revises: e7f3a9c05b62
+Create Date: 2026-10-16 15:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f2b6c8d14a90"
+down_revision: Union[str, Sequence[str], None] = "e7f3a9c05b62"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("users", sa.Column("telegram_id", sa.BigInteger(), nullable=True))
+
+    # Переносим id из username формата tg_123456789
+    op.execute(
+        r"""
+        UPDATE users
+        SET telegram_id = substring(username FROM 4)::bigint
+        WHERE username ~ '^tg_[0-9]{1,18}$'
+        """
+    )
+
+    op.create_index(op.f("ix_users_telegram_id"), "users", ["telegram_id"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_users_telegram_id"), table_name="users")
+    op.drop_column("users", "telegram_id")
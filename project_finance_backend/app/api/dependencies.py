@@ -1,4 +1,18 @@
-from app.db import AsyncSessionLocal
+import asyncio
+import logging
+
+from fastapi import Request, Response
+from sqlalchemy.exc import DBAPIError
+
+from app.db import (
+    AsyncSessionLocal,
+    ReplicaSessionLocal,
+    is_recent_writer,
+    mark_replica_down,
+    replica_available,
+)
+
+logger = logging.getLogger(__name__)
 
 
 # Зависимость Fastapi для подключения к бд
@@ -7,11 +21,55 @@ async def get_db():
         yield db_session
 
 
+# Сессия для read-only эндпоинтов: реплика, если она настроена и доступна,
+# и клиент недавно ничего не записывал, иначе primary
+async def get_read_db(request: Request):
+    if replica_available() and not is_recent_writer(
+        request.headers.get("authorization")
+    ):
+        replica_session = ReplicaSessionLocal()
+        try:
+            await replica_session.connection()
+        except (OSError, DBAPIError, asyncio.TimeoutError) as e:
+            await replica_session.close()
+            mark_replica_down()
+            logger.warning(f"Read replica unavailable, falling back to primary: {e}")
+        else:
+            async with replica_session:
+                yield replica_session
+            return
+
+    async with AsyncSessionLocal() as db_session:
+        yield db_session
+
+
 from fastapi import Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.models.user import Users
 from app.core.security import verify_access_token, oauth2_scheme
+from app.crud.user import UserIdentity, get_user_identity, cache_user_identity
+from app.crud.data_version import get_data_version
+from app.core.serialization import wants_msgpack
+
+
+async def get_current_identity(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
+) -> UserIdentity:
+    """
+    Быстрый путь для маршрутов, которым нужны только id и is_admin:
+    токен и пользователь берутся из кэшей, в БД идем только при промахе
+    """
+    user_id = verify_access_token(token)
+
+    identity = await get_user_identity(db, int(user_id))
+    if identity is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Пользователь не найден",
+        )
+
+    return identity
 
 
 async def get_current_user(
@@ -34,12 +92,66 @@ async def get_current_user(
             detail="Пользователь не найден",
         )
 
+    cache_user_identity(user)
     return user
 
 
-async def get_current_admin(current_user: Users = Depends(get_current_user)):
+async def get_current_admin(
+    current_user: UserIdentity = Depends(get_current_identity),
+):
     if not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Нужна админка"
         )
     return current_user
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip() == etag for tag in if_none_match.split(","))
+
+
+def _not_modified(request: Request, response: Response, user_id: int, version: int):
+    # Разные представления (JSON / MessagePack) - разные ETag
+    suffix = "-msgpack" if wants_msgpack(request) else ""
+    etag = f'"{user_id}-{version}{suffix}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Accept"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+
+
+async def check_not_modified(
+    request: Request,
+    response: Response,
+    current_user: UserIdentity = Depends(get_current_identity),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    ETag из версии данных пользователя (users.data_version)
+
+    Подключается в dependencies= маршрута, поэтому выполняется до остальных
+    зависимостей: при совпадении If-None-Match отвечаем 304, не выполняя
+    запрос эндпоинта и сериализацию. Версия читается из той же сессии
+    (get_read_db), что и данные эндпоинта
+    """
+    version = await get_data_version(db, current_user.id)
+    _not_modified(request, response, current_user.id, version)
+
+
+async def check_user_not_modified(
+    request: Request,
+    response: Response,
+    current_user: Users = Depends(get_current_user),
+):
+    """
+    ETag для маршрутов, отдающих строку пользователя из get_current_user
+
+    Версия берется из той же строки (primary), что и тело ответа, поэтому
+    отстающая реплика не припишет старый ETag новым данным
+    """
+    _not_modified(request, response, current_user.id, current_user.data_version)
@@ -9,7 +9,10 @@ from aiogram.filters import StateFilter
 
 from app.bot.bot import bot
 from app.bot.states.voice import VoiceTransactionStates
-from app.bot.services.speech_recognition import transcribe_audio_file
+from app.bot.services.transcription_queue import (
+    transcription_queue,
+    TranscriptionQueueFull,
+)
 from app.bot.services.transaction_parser import parse_transaction_text
 from app.bot.services.category_matcher import match_categories_by_prefix
 from app.db import AsyncSessionLocal
@@ -61,11 +64,26 @@ async def handle_voice_message(message: Message, state: FSMContext):
             temp_path = temp_file.name
             await bot.download_file(file_path, temp_path)
         
-        # Распознаем речь
-        text = await transcribe_audio_file(temp_path)
-        
-        # Удаляем временный файл
-        os.unlink(temp_path)
+        # Распознаем речь через общую очередь
+        try:
+            position, transcription = transcription_queue.submit(user.id, temp_path)
+        except TranscriptionQueueFull:
+            os.unlink(temp_path)
+            await processing_msg.edit_text(
+                "⏳ Сейчас распознается слишком много голосовых. "
+                "Попробуйте отправить сообщение чуть позже."
+            )
+            return
+        if position > 1:
+            await processing_msg.edit_text(
+                f"🎤 Голосовое в очереди на распознавание: {position}-е. "
+                "Обработаю, как только дойдет очередь..."
+            )
+        try:
+            text = await transcription
+        finally:
+            # Удаляем временный файл
+            os.unlink(temp_path)
         
         if not text:
             await processing_msg.edit_text("❌ Не удалось распознать речь. Попробуйте ещё раз.")
@@ -4,7 +4,7 @@ from apscheduler.triggers.cron import CronTrigger
 import pytz
 
 from app.db import AsyncSessionLocal
-from app.crud.user import get_all_telegram_users
+from app.crud.user import get_all_telegram_ids
 from app.bot.bot import bot
 
 logger = logging.getLogger(__name__)
@@ -19,13 +19,10 @@ async def send_daily_notifications():
     """Отправляет ежедневные уведомления всем пользователям с Telegram"""
     try:
         async with AsyncSessionLocal() as db:
-            users = await get_all_telegram_users(db)
+            telegram_ids = await get_all_telegram_ids(db)
             
-            for user in users:
+            for telegram_id in telegram_ids:
                 try:
-                    # Извлекаем telegram_id из username (формат: tg_123456789)
-                    telegram_id = int(user.username.replace("tg_", ""))
-                    
                     await bot.send_message(
                         chat_id=telegram_id,
                         text=(
@@ -36,7 +33,7 @@ async def send_daily_notifications():
                     )
                     logger.info(f"Sent daily notification to user {telegram_id}")
                 except Exception as e:
-                    logger.error(f"Error sending notification to user {user.username}: {e}")
+                    logger.error(f"Error sending notification to user {telegram_id}: {e}")
     except Exception as e:
         logger.error(f"Error in send_daily_notifications: {e}")
 
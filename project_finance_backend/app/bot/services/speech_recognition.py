@@ -1,58 +1,234 @@
-import whisper
-import tempfile
+import asyncio
+import hashlib
+import multiprocessing
 import os
-from pathlib import Path
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import Optional
 import logging
 
+from app.core.config import settings
+
 logger = logging.getLogger(__name__)
 
-# Глобальная переменная для хранения модели
+# Модель Whisper в процессе-воркере пула. whisper и torch импортируются только
+# там: процессы, которые лишь обслуживают API, их не загружают
 _whisper_model = None
 
+# Готовность распознавания для метрик: cold -> warming -> ready | unavailable;
+# workers_ready - сколько процессов пула ответили на прогреве с загруженной моделью
+transcription_status = {
+    "state": "cold",
+    "model": settings.whisper_model,
+    "workers_ready": 0,
+}
+
+# Пул процессов для распознавания: transcribe занимает секунды CPU и не должен
+# блокировать event loop, на котором работают API и бот
+_executor: ProcessPoolExecutor | None = None
+
+# Подсказка для лучшего распознавания чисел
+# Важно: числа должны распознаваться как цифры, а не словами
+INITIAL_PROMPT = (
+    "Расход 1456 на продукты. Доход 5000 зарплата. "
+    "Расход 8234 на коммунальные. Доход 10000 бонус. "
+    "Расход 250 на транспорт. Доход 3000 подарок."
+)
+
+
+def _model_dir() -> str:
+    if settings.whisper_model_dir:
+        return settings.whisper_model_dir
+    cache_home = os.getenv("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+    return os.path.join(cache_home, "whisper")
+
+
+def _verified_local_model(model_name: str) -> Optional[str]:
+    """
+    Путь к уже скачанной модели, если ее SHA256 совпадает с ожидаемым
+    (whisper хранит его в URL модели), иначе None. В сеть не ходит
+    """
+    import whisper
+
+    url = whisper._MODELS.get(model_name)
+    if url is None:
+        return None
+    path = os.path.join(_model_dir(), os.path.basename(url))
+    if not os.path.isfile(path):
+        return None
+    expected_sha256 = url.split("/")[-2]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    if digest.hexdigest() != expected_sha256:
+        logger.warning(f"Whisper model checksum mismatch: {path}")
+        return None
+    return path
+
+
+def load_whisper_model(model_name: str, offline: bool = False):
+    """
+    Загружает модель Whisper (один раз на процесс)
 
-def load_whisper_model(model_name: str = "tiny"):
-    """Загружает модель Whisper (загружается один раз)"""
+    offline=True - только из проверенного локального кэша, без скачивания;
+    если модели там нет, возвращает None
+    """
     global _whisper_model
     if _whisper_model is None:
+        import whisper
+
+        local_path = _verified_local_model(model_name)
+        if local_path is None and offline:
+            return None
         logger.info(f"Loading Whisper model: {model_name}")
-        _whisper_model = whisper.load_model(model_name)
+        _whisper_model = whisper.load_model(
+            local_path or model_name, download_root=_model_dir()
+        )
         logger.info("Whisper model loaded successfully")
     return _whisper_model
 
 
-async def transcribe_audio_file(audio_path: str, model_name: str = "tiny") -> Optional[str]:
+def _init_worker(model_name: str):
+    # Модель из локального кэша грузим сразу при старте воркера; если ее нет,
+    # она скачается при первом распознавании
+    try:
+        load_whisper_model(model_name, offline=True)
+    except Exception as e:
+        logger.error(f"Whisper worker warm-up failed: {e}")
+
+
+def _worker_ready() -> tuple[int, bool]:
+    # Короткая задержка не дает одному свободному воркеру забрать все проверки
+    time.sleep(0.05)
+    return os.getpid(), _whisper_model is not None
+
+
+def _transcribe_in_worker(audio_path: str, model_name: str) -> str:
+    """Выполняется в процессе пула"""
+    model = load_whisper_model(model_name)
+    result = model.transcribe(audio_path, language="ru", initial_prompt=INITIAL_PROMPT)
+    return result["text"].strip()
+
+
+def _get_executor(model_name: str) -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn: fork процесса с потоками event loop и torch небезопасен
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.whisper_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_name,),
+        )
+    return _executor
+
+
+def _reset_executor():
+    """Останавливает пул вместе с зависшими или упавшими воркерами"""
+    global _executor
+    executor, _executor = _executor, None
+    if executor is None:
+        return
+    # Штатного способа прервать выполняющуюся задачу нет - завершаем процессы
+    for process in list((executor._processes or {}).values()):
+        process.terminate()
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_transcription_pool():
+    _reset_executor()
+
+
+async def warm_up_transcription():
     """
-    Распознает речь в аудиофайле используя Whisper
-    
-    Args:
-        audio_path: Путь к аудиофайлу
-        model_name: Название модели Whisper (tiny, base, small, medium, large)
-    
-    Returns:
-        Распознанный текст или None в случае ошибки
+    Поднимает процессы пула и загружает в них модель из локального кэша,
+    чтобы первое голосовое не ждало импорта torch и загрузки модели
     """
+    transcription_status["state"] = "warming"
+    loop = asyncio.get_running_loop()
+    # pid -> модель загружена. Проверку берет любой свободный процесс, а занятый
+    # загрузкой модели не отвечает - опрашиваем, пока не ответят все
+    # whisper_workers процессов (не дольше whisper_timeout)
+    workers: dict[int, bool] = {}
+    deadline = loop.time() + settings.whisper_timeout
     try:
-        model = load_whisper_model(model_name)
-        logger.info(f"Transcribing audio file: {audio_path}")
-        
-        # Распознавание речи с подсказкой для лучшего распознавания чисел
-        # Важно: числа должны распознаваться как цифры, а не словами
-        initial_prompt = (
-            "Расход 1456 на продукты. Доход 5000 зарплата. "
-            "Расход 8234 на коммунальные. Доход 10000 бонус. "
-            "Расход 250 на транспорт. Доход 3000 подарок."
+        executor = _get_executor(settings.whisper_model)
+        while True:
+            answers = await asyncio.gather(
+                *(
+                    loop.run_in_executor(executor, _worker_ready)
+                    for _ in range(settings.whisper_workers)
+                )
+            )
+            workers.update(answers)
+            if len(workers) >= settings.whisper_workers or loop.time() >= deadline:
+                break
+            await asyncio.sleep(0.5)
+    except Exception as e:
+        transcription_status["state"] = "unavailable"
+        logger.error(f"Whisper warm-up failed: {e}")
+        return
+    ready = sum(workers.values())
+    transcription_status["workers_ready"] = ready
+    if ready >= settings.whisper_workers:
+        transcription_status["state"] = "ready"
+        logger.info(f"Whisper model {settings.whisper_model} is ready")
+    elif len(workers) < settings.whisper_workers:
+        transcription_status["state"] = "cold"
+        logger.warning(
+            f"Whisper warm-up reached {len(workers)} of "
+            f"{settings.whisper_workers} workers"
         )
-        result = model.transcribe(
-            audio_path, 
-            language="ru",
-            initial_prompt=initial_prompt
+    else:
+        # Модели нет в локальном кэше: скачается при первом распознавании
+        transcription_status["state"] = "cold"
+        logger.warning(
+            f"Whisper model {settings.whisper_model} not found in {_model_dir()}"
         )
-        text = result["text"].strip()
-        
-        logger.info(f"Transcribed text: {text}")
-        return text
-    except Exception as e:
-        logger.error(f"Error transcribing audio: {e}")
-        return None
 
+
+async def transcribe_audio_file(
+    audio_path: str, model_name: str | None = None
+) -> Optional[str]:
+    """
+    Распознает речь в аудиофайле используя Whisper в пуле процессов
+
+    Args:
+        audio_path: Путь к аудиофайлу
+        model_name: Название модели Whisper (tiny, base, small, medium, large),
+            по умолчанию settings.whisper_model
+
+    Returns:
+        Распознанный текст или None в случае ошибки или таймаута
+    """
+    model_name = model_name or settings.whisper_model
+    loop = asyncio.get_running_loop()
+    # Вторая попытка - только если воркер упал (например, OOM)
+    for attempt in range(2):
+        try:
+            logger.info(f"Transcribing audio file: {audio_path}")
+            text = await asyncio.wait_for(
+                loop.run_in_executor(
+                    _get_executor(model_name),
+                    _transcribe_in_worker,
+                    audio_path,
+                    model_name,
+                ),
+                timeout=settings.whisper_timeout,
+            )
+            logger.info(f"Transcribed text: {text}")
+            transcription_status["state"] = "ready"
+            return text
+        except BrokenProcessPool:
+            logger.error("Whisper worker crashed, restarting pool")
+            _reset_executor()
+        except asyncio.TimeoutError:
+            logger.error(f"Transcription timed out after {settings.whisper_timeout}s")
+            _reset_executor()
+            return None
+        except Exception as e:
+            logger.error(f"Error transcribing audio: {e}")
+            return None
+    return None
@@ -0,0 +1,157 @@
+"""
+Очередь распознавания голосовых с ограничением нагрузки
+
+Одновременно распознается не больше whisper_workers сообщений (по числу
+процессов пула). Ожидающие задачи раздаются по пользователям по кругу, поэтому
+один пользователь, переславший двадцать голосовых, не задерживает остальных.
+У каждого пользователя в очереди не больше transcription_max_per_user задач,
+всего - не больше transcription_max_queue, сверх этого submit отказывает.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+
+from app.core.config import settings
+from app.bot.services.speech_recognition import transcribe_audio_file
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriptionQueueFull(Exception):
+    """Очередь (общая или пользователя) заполнена"""
+
+
+@dataclass
+class _Job:
+    user_id: int
+    audio_path: str
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class TranscriptionQueue:
+    def __init__(self, workers: int, max_queue: int, max_per_user: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_per_user = max_per_user
+        # user_id -> задачи пользователя; порядок ключей - очередь обхода по кругу
+        self._pending: OrderedDict[int, deque[_Job]] = OrderedDict()
+        self._size = 0
+        self._available: asyncio.Semaphore | None = None
+        self._worker_tasks: list[asyncio.Task] = []
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _position(self, user_id: int) -> int:
+        """
+        Номер только что добавленной задачи пользователя в очереди (с 1)
+
+        Если все воркеры заняты, впереди и выполняющиеся задачи
+        """
+        rounds = len(self._pending[user_id])
+        ahead = sum(
+            min(len(jobs), rounds if other_id != user_id else rounds - 1)
+            for other_id, jobs in self._pending.items()
+        )
+        if self.running >= self.workers:
+            ahead += self.running
+        return ahead + 1
+
+    def submit(self, user_id: int, audio_path: str) -> tuple[int, asyncio.Future]:
+        """
+        Ставит файл в очередь. Возвращает позицию в очереди и future с текстом
+
+        Raises:
+            TranscriptionQueueFull: если очередь или лимит пользователя заполнены
+        """
+        user_jobs = self._pending.get(user_id)
+        if self._size >= self.max_queue or (
+            user_jobs is not None and len(user_jobs) >= self.max_per_user
+        ):
+            self.rejected += 1
+            raise TranscriptionQueueFull()
+
+        self._start_workers()
+        future = asyncio.get_running_loop().create_future()
+        if user_jobs is None:
+            user_jobs = self._pending[user_id] = deque()
+        user_jobs.append(_Job(user_id, audio_path, future))
+        self._size += 1
+        self._available.release()
+        return self._position(user_id), future
+
+    def _next_job(self) -> _Job:
+        user_id, jobs = self._pending.popitem(last=False)
+        job = jobs.popleft()
+        if jobs:
+            # Следующая задача этого пользователя - в конец круга
+            self._pending[user_id] = jobs
+        self._size -= 1
+        return job
+
+    async def _worker(self):
+        while True:
+            await self._available.acquire()
+            job = self._next_job()
+            if job.future.done():
+                # Обработчик сообщения уже отменен
+                continue
+            wait = time.monotonic() - job.enqueued_at
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self.running += 1
+            try:
+                text = await transcribe_audio_file(job.audio_path)
+            except Exception as e:
+                logger.error(f"Transcription job failed: {e}")
+                text = None
+            finally:
+                self.running -= 1
+                self.completed += 1
+            if not job.future.done():
+                job.future.set_result(text)
+
+    def _start_workers(self):
+        if self._worker_tasks:
+            return
+        self._available = asyncio.Semaphore(0)
+        self._worker_tasks = [
+            asyncio.create_task(self._worker()) for _ in range(self.workers)
+        ]
+
+    def stop(self):
+        for task in self._worker_tasks:
+            task.cancel()
+        self._worker_tasks = []
+        for jobs in self._pending.values():
+            for job in jobs:
+                if not job.future.done():
+                    job.future.cancel()
+        self._pending.clear()
+        self._size = 0
+
+    def stats(self) -> dict:
+        started = self.completed + self.running
+        return {
+            "depth": self._size,
+            "users_waiting": len(self._pending),
+            "running": self.running,
+            "workers": self.workers,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait": self.total_wait / started if started else 0.0,
+            "max_wait": self.max_wait,
+        }
+
+
+transcription_queue = TranscriptionQueue(
+    workers=settings.whisper_workers,
+    max_queue=settings.transcription_max_queue,
+    max_per_user=settings.transcription_max_per_user,
+)
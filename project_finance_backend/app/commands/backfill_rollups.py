@@ -0,0 +1,30 @@
+"""
+Пересчет таблицы daily_rollups по transactions
+
+    python -m app.commands.backfill_rollups            # все пользователи
+    python -m app.commands.backfill_rollups --user-id 42
+"""
+
+import argparse
+import asyncio
+import logging
+
+from app.db import AsyncSessionLocal, async_engine
+from app.crud.rollup import rebuild_rollups
+
+logger = logging.getLogger(__name__)
+
+
+async def main(user_id: int | None):
+    async with AsyncSessionLocal() as db:
+        await rebuild_rollups(db, user_id)
+    await async_engine.dispose()
+    logger.info("daily_rollups rebuilt" + (f" for user {user_id}" if user_id else ""))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Rebuild daily_rollups")
+    parser.add_argument("--user-id", type=int, default=None)
+    args = parser.parse_args()
+    asyncio.run(main(args.user_id))
@@ -0,0 +1,30 @@
+"""
+Пересчет lifetime-итогов пользователей (total_income, total_expense, счетчики)
+
+    python -m app.commands.recompute_user_totals            # все пользователи
+    python -m app.commands.recompute_user_totals --user-id 42
+"""
+
+import argparse
+import asyncio
+import logging
+
+from app.db import AsyncSessionLocal, async_engine
+from app.crud.user import recompute_user_totals
+
+logger = logging.getLogger(__name__)
+
+
+async def main(user_id: int | None):
+    async with AsyncSessionLocal() as db:
+        await recompute_user_totals(db, user_id)
+    await async_engine.dispose()
+    logger.info("User totals recomputed" + (f" for user {user_id}" if user_id else ""))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Recompute user lifetime totals")
+    parser.add_argument("--user-id", type=int, default=None)
+    args = parser.parse_args()
+    asyncio.run(main(args.user_id))
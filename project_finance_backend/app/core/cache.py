@@ -0,0 +1,98 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# Все созданные кэши по имени: для метрик и для межпроцессной инвалидации
+caches: dict[str, "TTLCache"] = {}
+
+
+class TTLCache:
+    """
+    Ограниченный по размеру LRU-кэш с TTL в памяти процесса
+
+    Рассчитан на один event loop (без блокировок). Считает попадания и промахи
+
+    Значение, прочитанное из БД до инвалидации, не должно попасть в кэш после
+    нее: перед чтением берется generation, и set(..., generation=...) ничего
+    не записывает, если ключ с тех пор инвалидировали
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        # Номер последней инвалидации; для ключа - номер его последней
+        # инвалидации (не больше maxsize ключей, вытесненные учтены в _forgotten)
+        self.generation = 0
+        self._invalidated_at: OrderedDict[Hashable, int] = OrderedDict()
+        self._forgotten = 0
+        caches[name] = self
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: float | None = None,
+        generation: int | None = None,
+    ):
+        if self.maxsize <= 0:
+            return
+        if (
+            generation is not None
+            and self._invalidated_at.get(key, self._forgotten) > generation
+        ):
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        self._data.pop(key, None)
+        self.generation += 1
+        self._invalidated_at[key] = self.generation
+        self._invalidated_at.move_to_end(key)
+        while len(self._invalidated_at) > max(self.maxsize, 1):
+            _, self._forgotten = self._invalidated_at.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+        self.generation += 1
+        self._invalidated_at.clear()
+        self._forgotten = self.generation
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
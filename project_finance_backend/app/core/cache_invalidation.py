@@ -0,0 +1,79 @@
+"""
+Инвалидация кэшей между воркерами через Postgres LISTEN/NOTIFY
+
+Каждый воркер держит одно соединение с LISTEN на канале; запись, изменившая
+закэшированные данные, после commit вызывает invalidate(): локальный кэш
+чистится сразу, остальные воркеры - по уведомлению. Если уведомление
+потерялось (например, оборвалось соединение), устаревание ограничено TTL кэша.
+Не работает через PgBouncer в режиме transaction pooling.
+"""
+
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.core.cache import TTLCache, caches
+from app.core.config import settings
+from app.db import async_engine
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "cache_invalidation"
+ALL_KEYS = "*"
+
+_listener_connection: AsyncConnection | None = None
+
+
+async def invalidate(db: AsyncSession, cache: TTLCache, key: int | str):
+    """Сбрасывает ключ во всех воркерах. Вызывать после commit"""
+    if key == ALL_KEYS:
+        cache.clear()
+    else:
+        cache.invalidate(key)
+    if settings.cache_shared_invalidation:
+        await db.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": CHANNEL, "payload": f"{cache.name}:{key}"},
+        )
+        await db.commit()
+
+
+def _on_notification(connection, pid, channel, payload: str):
+    name, _, key = payload.partition(":")
+    cache = caches.get(name)
+    if cache is None:
+        return
+    if key == ALL_KEYS:
+        cache.clear()
+    else:
+        # Ключи всех разделяемых кэшей - id пользователей
+        try:
+            cache.invalidate(int(key))
+        except ValueError:
+            logger.warning(f"Bad cache invalidation payload: {payload}")
+
+
+async def start_invalidation_listener():
+    global _listener_connection
+    if not settings.cache_shared_invalidation or _listener_connection is not None:
+        return
+    connection = await async_engine.connect()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.add_listener(CHANNEL, _on_notification)
+    _listener_connection = connection
+    logger.info("Cache invalidation listener started")
+
+
+async def stop_invalidation_listener():
+    global _listener_connection
+    if _listener_connection is None:
+        return
+    try:
+        raw_connection = await _listener_connection.get_raw_connection()
+        await raw_connection.driver_connection.remove_listener(
+            CHANNEL, _on_notification
+        )
+    finally:
+        await _listener_connection.close()
+        _listener_connection = None
@@ -26,10 +26,59 @@ class Settings(BaseSettings):
     jwt_secret: str
     algorithm: str
     access_token_expire_minutes: int
-    
+
+    # Пул соединений с БД
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800  # секунды, -1 = не пересоздавать
+    db_pool_pre_ping: bool = True
+    db_statement_cache_size: int = 100  # кэш prepared statements asyncpg
+    # Режим совместимости с transaction pooler (PgBouncer и т.п.):
+    # отключает кэш prepared statements, которые не переживают смену backend
+    db_transaction_pooler: bool = False
+    db_pool_warmup: bool = True  # открыть db_pool_size соединений при старте
+
+    # Реплика для read-only эндпоинтов (пусто = все читаем с primary)
+    database_replica_url: str = ""
+    # Сколько секунд после записи клиент читает с primary (read-your-writes)
+    db_replica_sticky_seconds: float = 5.0
+    # Через сколько секунд снова пробовать реплику после ошибки соединения
+    db_replica_retry_seconds: float = 30.0
+
+    # Кэши в памяти процесса
+    category_cache_size: int = 10_000  # пользователей
+    category_cache_ttl: float = 300.0
+    token_cache_size: int = 10_000
+    token_cache_ttl: float = 300.0  # но не дольше срока жизни токена
+    user_cache_size: int = 10_000
+    user_cache_ttl: float = 60.0
+    data_version_cache_size: int = 10_000  # версии данных для ETag
+    data_version_cache_ttl: float = 60.0
+    # Рассылать инвалидацию кэшей другим воркерам через Postgres NOTIFY.
+    # Без нее версии данных для ETag не кэшируются
+    cache_shared_invalidation: bool = True
+
+    # Пул потоков для bcrypt (хэширование паролей вне event loop)
+    password_hash_workers: int = 4
+    password_hash_max_waiting: int = 100  # сверх этого - 503
+
+    # Распознавание голосовых (Whisper) в отдельных процессах
+    whisper_model: str = "tiny"  # tiny, base, small, medium, large
+    whisper_model_dir: str = ""  # пусто - кэш whisper по умолчанию (~/.cache/whisper)
+    # Загрузить модель в пул при старте (только из локального кэша, без сети)
+    whisper_warmup: bool = False
+    whisper_workers: int = 1
+    whisper_timeout: float = 120.0  # секунды на одно сообщение
+    transcription_max_queue: int = 100  # голосовых в очереди всего
+    transcription_max_per_user: int = 3  # и от одного пользователя
+
     # Telegram Bot
     telegram_bot_token: str
     telegram_webapp_url: str = ""  # URL вашего фронтенда
+    # Сколько секунд initData от WebApp считается действительной (0 = без ограничения)
+    telegram_init_data_max_age: int = 86400
+    telegram_init_data_cache_size: int = 10_000
 
     model_config = SettingsConfigDict(
         # Pydantic будет читать переменные из окружения (уже загруженные через load_dotenv)
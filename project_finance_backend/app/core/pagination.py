@@ -0,0 +1,44 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+
+from fastapi import HTTPException, Response
+
+# Заголовок, в котором list-эндпоинты отдают курсор следующей страницы
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values) -> str:
+    """Упаковывает значения ключа сортировки последней строки в непрозрачный курсор"""
+    raw = json.dumps(
+        [value.isoformat() if isinstance(value, date) else value for value in values],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types) -> tuple:
+    """
+    Распаковывает курсор, приводя значения к types (datetime, date, int, ...)
+
+    Raises:
+        HTTPException(400): если курсор поврежден или не того формата
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("cursor shape mismatch")
+        return tuple(
+            type_.fromisoformat(value) if type_ in (date, datetime) else type_(value)
+            for type_, value in zip(types, values)
+        )
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def set_next_cursor(response: Response, items: list, limit: int, key):
+    """Выставляет X-Next-Cursor, если страница заполнена полностью"""
+    if limit > 0 and len(items) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*key(items[-1]))
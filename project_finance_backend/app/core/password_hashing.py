@@ -0,0 +1,95 @@
+"""
+Выполнение bcrypt вне event loop
+
+hashpw/checkpw занимают ~200 мс CPU и отпускают GIL, поэтому их можно
+выполнять в отдельном пуле потоков, не блокируя остальные запросы и поллинг
+бота. Пул ограничен: одновременно считается не больше
+password_hash_workers хэшей, в очереди ждут не больше
+password_hash_max_waiting запросов, остальные получают 503.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, TypeVar
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+
+@dataclass
+class PasswordPoolStats:
+    """Нагрузка на пул bcrypt: сколько задач ждали и сколько было отказов"""
+
+    completed: int = 0
+    rejected: int = 0
+    waiting: int = 0
+    running: int = 0
+    total_queue_wait: float = 0.0
+    max_queue_wait: float = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "workers": settings.password_hash_workers,
+            "max_waiting": settings.password_hash_max_waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "waiting": self.waiting,
+            "running": self.running,
+            "avg_queue_wait": (
+                self.total_queue_wait / self.completed if self.completed else 0.0
+            ),
+            "max_queue_wait": self.max_queue_wait,
+        }
+
+
+password_pool_stats = PasswordPoolStats()
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers, thread_name_prefix="bcrypt"
+)
+_slots = asyncio.Semaphore(settings.password_hash_workers)
+
+
+async def run_in_password_pool(func: Callable[..., T], *args) -> T:
+    """
+    Выполняет func(*args) в пуле bcrypt
+
+    Raises:
+        HTTPException(503): если очередь пула переполнена
+    """
+    stats = password_pool_stats
+    if stats.waiting >= settings.password_hash_max_waiting:
+        stats.rejected += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Сервер перегружен, попробуйте позже",
+        )
+
+    start = time.perf_counter()
+    stats.waiting += 1
+    try:
+        await _slots.acquire()
+    finally:
+        stats.waiting -= 1
+
+    try:
+        wait = time.perf_counter() - start
+        stats.total_queue_wait += wait
+        if wait > stats.max_queue_wait:
+            stats.max_queue_wait = wait
+        stats.running += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, func, *args)
+    finally:
+        stats.running -= 1
+        stats.completed += 1
+        _slots.release()
+
+
+def shutdown_password_pool():
+    _executor.shutdown(wait=False, cancel_futures=True)
@@ -3,10 +3,17 @@ import jwt
 from fastapi import HTTPException, Depends
 from fastapi.security import OAuth2PasswordBearer
 from app.core.config import settings
+from app.core.cache import TTLCache
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/token")
 
+# token -> user_id уже проверенных токенов (содержимое токена неизменно,
+# поэтому инвалидация не нужна - только срок жизни)
+token_cache = TTLCache(
+    "tokens", maxsize=settings.token_cache_size, ttl=settings.token_cache_ttl
+)
+
 
 def create_access_token(user_id: int, expires_delta: timedelta | None = None):
     now = datetime.now(timezone.utc)
@@ -27,6 +34,10 @@ def create_access_token(user_id: int, expires_delta: timedelta | None = None):
 
 
 def verify_access_token(token: str):
+    cached_user_id = token_cache.get(token)
+    if cached_user_id is not None:
+        return cached_user_id
+
     try:
         payload = jwt.decode(
             token, settings.jwt_secret, algorithms=[settings.algorithm]
@@ -34,7 +45,13 @@ def verify_access_token(token: str):
         user_id: int = payload.get("sub")
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid token")
-        return int(user_id)
+        user_id = int(user_id)
+        token_cache.set(
+            token,
+            user_id,
+            ttl=payload["exp"] - datetime.now(timezone.utc).timestamp(),
+        )
+        return user_id
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except jwt.InvalidTokenError:
@@ -0,0 +1,72 @@
+from typing import Any
+
+import msgpack
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+_MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+_JSON_MEDIA_TYPES = ("application/json", "application/*", "*/*")
+
+
+def _accept_weights(accept: str) -> dict[str, float]:
+    """Media range из заголовка Accept -> q (без q - 1.0)"""
+    weights = {}
+    for media_range in accept.split(","):
+        media_type, *params = media_range.split(";")
+        media_type = media_type.strip().lower()
+        if not media_type:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[media_type] = max(q, weights.get(media_type, 0.0))
+    return weights
+
+
+def wants_msgpack(request: Request) -> bool:
+    """
+    Клиент явно попросил MessagePack (Accept: application/msgpack) с q > 0
+    и не предпочел ему JSON
+    """
+    weights = _accept_weights(request.headers.get("accept", ""))
+    msgpack_q = max((weights.get(t, 0.0) for t in _MSGPACK_MEDIA_TYPES))
+    json_q = max((weights.get(t, 0.0) for t in _JSON_MEDIA_TYPES))
+    return msgpack_q > 0 and msgpack_q >= json_q
+
+
+def encode_response(
+    request: Request,
+    response: Response,
+    adapter: TypeAdapter,
+    items: Any,
+    from_attributes: bool = False,
+) -> Response:
+    """
+    Быстрый путь для GET-эндпоинтов: проверка и сериализация целиком
+    в pydantic-core (TypeAdapter создается один раз на модуль) без
+    jsonable_encoder и json.dumps. По Accept отдает JSON или MessagePack
+    с теми же полями
+
+    Заголовки, выставленные зависимостями и эндпоинтом в response (курсор,
+    ETag), переносятся в ответ
+    """
+    validated = adapter.validate_python(items, from_attributes=from_attributes)
+    if wants_msgpack(request):
+        # mode="json": datetime и enum - в тех же строках, что и в JSON
+        content = msgpack.packb(adapter.dump_python(validated, mode="json"))
+        media_type = MSGPACK_MEDIA_TYPE
+    else:
+        content = adapter.dump_json(validated)
+        media_type = "application/json"
+
+    headers = {
+        key: value for key, value in response.headers.items() if key != "content-length"
+    }
+    headers["Vary"] = "Accept"
+    return Response(content=content, media_type=media_type, headers=headers)
@@ -1,78 +1,120 @@
 import hashlib
 import hmac
+import logging
+import time
+from functools import lru_cache
 from urllib.parse import parse_qsl
 from typing import Optional, Dict
 
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# init_data -> уже проверенные данные: повторное открытие WebApp с той же
+# initData не пересчитывает HMAC. Запись живет не дольше, чем сама initData
+verified_init_data_cache = TTLCache(
+    "telegram_init_data",
+    maxsize=settings.telegram_init_data_cache_size,
+    ttl=settings.telegram_init_data_max_age or 86400,
+)
+
+
+@lru_cache(maxsize=8)
+def _secret_key(bot_token: str) -> bytes:
+    """HMAC("WebAppData", bot_token) - считается один раз на токен"""
+    return hmac.new(
+        key=b"WebAppData", msg=bot_token.encode(), digestmod=hashlib.sha256
+    ).digest()
+
+
+def _expires_in(auth_date: int) -> float:
+    """Сколько секунд initData еще действительна (<= 0 - просрочена)"""
+    max_age = settings.telegram_init_data_max_age
+    if max_age <= 0:
+        return float("inf")
+    return auth_date + max_age - time.time()
+
 
 def verify_telegram_webapp_data(
     init_data: str, bot_token: str
 ) -> Optional[Dict[str, str]]:
     """
     Верификация данных от Telegram WebApp
-    
+
     Args:
         init_data: Строка initData от Telegram WebApp
         bot_token: Токен бота от BotFather
-        
+
     Returns:
         Словарь с данными пользователя или None если верификация не прошла
+        или initData старше telegram_init_data_max_age
     """
-    import logging
-    logger = logging.getLogger(__name__)
-    
     try:
         if not init_data:
             logger.error("init_data is empty")
             return None
-            
+
         if not bot_token:
             logger.error("bot_token is empty")
             return None
-        
+
+        cache_key = (bot_token, init_data)
+        cached = verified_init_data_cache.get(cache_key)
+        if cached is not None:
+            if _expires_in(int(cached["auth_date"])) <= 0:
+                verified_init_data_cache.invalidate(cache_key)
+                logger.warning("Telegram init_data expired")
+                return None
+            return dict(cached)
+
         # Парсим данные
         parsed_data = dict(parse_qsl(init_data))
-        logger.debug(f"Parsed data keys: {list(parsed_data.keys())}")
-        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Parsed data keys: %s", list(parsed_data.keys()))
+
         # Извлекаем hash
         received_hash = parsed_data.pop("hash", None)
         if not received_hash:
             logger.error("Hash not found in init_data")
             return None
-        
-        # Создаем секретный ключ
-        secret_key = hmac.new(
-            key=b"WebAppData",
-            msg=bot_token.encode(),
-            digestmod=hashlib.sha256
-        ).digest()
-        
+
         # Создаем строку для проверки
         data_check_string = "\n".join(
             f"{k}={v}" for k, v in sorted(parsed_data.items())
         )
-        
+
         # Вычисляем hash
         calculated_hash = hmac.new(
-            key=secret_key,
+            key=_secret_key(bot_token),
             msg=data_check_string.encode(),
             digestmod=hashlib.sha256
         ).hexdigest()
-        
+
         # Проверяем hash (защита от timing attack)
         if not hmac.compare_digest(calculated_hash, received_hash):
-            logger.error(f"Hash mismatch. Calculated: {calculated_hash[:10]}..., Received: {received_hash[:10]}...")
+            logger.error(
+                "Hash mismatch. Calculated: %s..., Received: %s...",
+                calculated_hash[:10],
+                received_hash[:10],
+            )
             return None
-        
-        # Проверяем время (данные действительны 24 часа)
+
+        # Проверяем время: старые initData не принимаем (защита от повтора)
         auth_date = int(parsed_data.get("auth_date", 0))
         if auth_date == 0:
             logger.error("auth_date is missing or zero")
             return None
-        
+
+        expires_in = _expires_in(auth_date)
+        if expires_in <= 0:
+            logger.warning("Telegram init_data expired (auth_date=%s)", auth_date)
+            return None
+
+        verified_init_data_cache.set(cache_key, parsed_data, ttl=expires_in)
         logger.info("Telegram data verification successful")
-        return parsed_data
-        
+        return dict(parsed_data)
+
     except Exception as e:
-        logger.error(f"Error verifying Telegram data: {str(e)}", exc_info=True)
+        logger.error("Error verifying Telegram data: %s", e, exc_info=True)
         return None
-
@@ -0,0 +1,146 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Users
+from app.crud.category import lock_user_categories
+from app.crud.transaction import TotalsDelta, apply_totals_delta
+from app.crud.rollup import RollupDeltas
+from app.crud.data_version import data_version_changed
+from app.schemas.transactions import TransactionImportRow
+
+IMPORT_MAX_ROWS = 200_000
+
+IMPORT_COLUMNS = [
+    "user_id",
+    "category_id",
+    "amount",
+    "transaction_type",
+    "description",
+    "created_at",
+]
+
+
+def parse_import_file(content: bytes, file_format: str) -> list[dict]:
+    """Разбирает CSV (с заголовком) или JSON-массив объектов в список сырых строк"""
+    try:
+        decoded = content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="File must be UTF-8 encoded")
+
+    if file_format == "json":
+        try:
+            rows = json.loads(decoded)
+        except json.JSONDecodeError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+        if not isinstance(rows, list):
+            raise HTTPException(status_code=400, detail="JSON must be an array")
+    else:
+        rows = list(csv.DictReader(io.StringIO(decoded)))
+
+    if len(rows) > IMPORT_MAX_ROWS:
+        raise HTTPException(
+            status_code=413, detail=f"Too many rows (max {IMPORT_MAX_ROWS})"
+        )
+    return rows
+
+
+def _naive_utc(value: datetime) -> datetime:
+    # created_at - timestamp without time zone
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _validate_rows(rows: list[dict]):
+    valid: list[tuple[int, TransactionImportRow]] = []
+    errors: list[dict] = []
+    for number, raw in enumerate(rows, start=1):
+        if not isinstance(raw, dict):
+            errors.append({"row": number, "error": "Row must be an object"})
+            continue
+        # Пустые ячейки CSV считаем отсутствующими значениями
+        raw = {key: value for key, value in raw.items() if value not in ("", None)}
+        try:
+            valid.append((number, TransactionImportRow.model_validate(raw)))
+        except ValidationError as e:
+            errors.append(
+                {
+                    "row": number,
+                    "error": "; ".join(
+                        f"{'.'.join(map(str, err['loc']))}: {err['msg']}"
+                        for err in e.errors()
+                    ),
+                }
+            )
+    return valid, errors
+
+
+async def import_transactions(current_user: Users, db: AsyncSession, rows: list[dict]):
+    """
+    Массовый импорт транзакций одной транзакцией БД
+
+    Категории проверяются одним запросом с FOR SHARE, строки грузятся
+    через COPY, баланс меняется одним UPDATE на суммарную дельту. Невалидные строки
+    пропускаются и возвращаются в errors с номером строки (с 1)
+    """
+    valid, errors = _validate_rows(rows)
+
+    owned_ids = await lock_user_categories(
+        db, current_user.id, {row.category_id for _, row in valid}
+    )
+
+    accepted: list[TransactionImportRow] = []
+    for number, row in valid:
+        if row.category_id not in owned_ids:
+            errors.append({"row": number, "error": "Category not found"})
+        else:
+            accepted.append(row)
+    errors.sort(key=lambda error: error["row"])
+
+    totals = TotalsDelta()
+    for row in accepted:
+        totals.add(row.transaction_type, row.amount)
+
+    # UPDATE заодно открывает транзакцию на соединении, в которой пойдет COPY
+    balance, now = await apply_totals_delta(db, current_user, totals)
+
+    records = []
+    rollups = RollupDeltas()
+    for row in accepted:
+        created_at = _naive_utc(row.created_at) if row.created_at else now
+        records.append(
+            (
+                current_user.id,
+                row.category_id,
+                row.amount,
+                # В Postgres enum transactiontype хранит имена: INCOME/EXPENSE
+                row.transaction_type.name,
+                row.description,
+                created_at,
+            )
+        )
+        rollups.add(
+            current_user.id,
+            created_at,
+            row.category_id,
+            row.transaction_type,
+            row.amount,
+        )
+
+    if records:
+        connection = await db.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            "transactions", columns=IMPORT_COLUMNS, records=records
+        )
+    await rollups.apply(db)
+
+    await db.commit()
+    await data_version_changed(db, current_user.id)
+    return {"imported": len(accepted), "errors": errors, "balance": balance}
@@ -1,11 +1,87 @@
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import delete, select, update, func
+from sqlalchemy.orm import make_transient_to_detached
 
 
-from app.models import Categories, Users
+from app.models import Categories, Users, Transactions
+from app.models.transaction import TransactionType
+from app.core.pagination import decode_cursor
+from app.core.cache import TTLCache
+from app.core.cache_invalidation import invalidate
+from app.core.config import settings
+from app.db import async_engine
+from app.crud.data_version import (
+    NEXT_DATA_VERSION,
+    bump_data_version,
+    data_version_changed,
+)
 from app.schemas.categories import CategoryCreate, CategoryUpdate
 
+# user_id -> все категории пользователя (отсоединенные от сессии), по id.
+# Только для чтения: записи проверяют владение категорией мимо кэша
+category_cache = TTLCache(
+    "categories",
+    maxsize=settings.category_cache_size,
+    ttl=settings.category_cache_ttl,
+)
+
+_CATEGORY_COLUMNS = (
+    Categories.id,
+    Categories.name,
+    Categories.type,
+    Categories.user_id,
+    Categories.color,
+    Categories.icon,
+)
+
+
+def _detached_category(row) -> Categories:
+    # Копия вне сессии вызывающего: его объекты не трогаем
+    category = Categories(**row._mapping)
+    make_transient_to_detached(category)
+    return category
+
+
+async def get_user_categories(db: AsyncSession, user_id: int) -> list[Categories]:
+    """
+    Все категории пользователя, упорядоченные по id, из кэша или из БД
+
+    Объекты отсоединены от сессии и общие для всех запросов - их нельзя
+    изменять или добавлять в сессию
+    """
+    categories = category_cache.get(user_id)
+    if categories is None:
+        generation = category_cache.generation
+        result = await db.execute(
+            select(*_CATEGORY_COLUMNS)
+            .where(Categories.user_id == user_id)
+            .order_by(Categories.id)
+        )
+        categories = tuple(_detached_category(row) for row in result)
+        # Список с отстающей реплики не кэшируем: записи бы его не увидели
+        if db.bind is async_engine:
+            category_cache.set(user_id, categories, generation=generation)
+    return list(categories)
+
+
+async def lock_user_categories(
+    db: AsyncSession, user_id: int, category_ids: set[int]
+) -> dict[int, Categories]:
+    """
+    Категории пользователя из category_ids для записи транзакций, по id
+
+    Читает primary мимо кэша с FOR SHARE: категорию не удалят до commit
+    """
+    if not category_ids:
+        return {}
+    result = await db.execute(
+        select(Categories)
+        .where(Categories.user_id == user_id, Categories.id.in_(category_ids))
+        .with_for_update(read=True)
+    )
+    return {c.id: c for c in result.scalars().all()}
+
 
 async def create_category(
     current_user: Users, db: AsyncSession, category_data: CategoryCreate
@@ -13,28 +89,39 @@ async def create_category(
     db_category = category_data.model_dump(exclude_unset=True)
     category = Categories(**db_category, user_id=current_user.id)
     db.add(category)
+    await bump_data_version(db, current_user.id)
     await db.commit()
     await db.refresh(category)
+    await invalidate(db, category_cache, current_user.id)
+    await data_version_changed(db, current_user.id)
     return category
 
 
 async def get_categories(
-    current_user: Users, db: AsyncSession, skip: int = 0, limit: int = 100
+    current_user: Users,
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
 ):
-    query = (
-        select(Categories)
-        .where(Categories.user_id == current_user.id)
-        .offset(skip)
-        .limit(limit)
-    )
-    result = await db.execute(query)
-    return result.scalars().all()
+    # Категорий у пользователя немного: страницы режем из закэшированного списка
+    categories = await get_user_categories(db, current_user.id)
+    if cursor:
+        (last_id,) = decode_cursor(cursor, int)
+        categories = [c for c in categories if c.id > last_id]
+    else:
+        categories = categories[skip:]
+    return categories[:limit]
 
 
-async def get_categories_id(db: AsyncSession, category_id: int, current_user: Users):
+async def get_categories_id(
+    db: AsyncSession, category_id: int, current_user: Users, for_update: bool = False
+):
     query = select(Categories).where(
         Categories.id == category_id, Categories.user_id == current_user.id
     )
+    if for_update:
+        query = query.with_for_update()
     result = await db.execute(query)
     return result.scalar_one_or_none()
 
@@ -53,15 +140,50 @@ async def update_category(
     for key, value in update_data.items():
         setattr(category, key, value)
     db.add(category)
+    await bump_data_version(db, current_user.id)
     await db.commit()
     await db.refresh(category)
+    await invalidate(db, category_cache, current_user.id)
+    await data_version_changed(db, current_user.id)
     return category
 
 
 async def delete_category(db: AsyncSession, category_id: int, current_user: Users):
-    category = await get_categories_id(db, category_id, current_user)
+    # Блокировка ждет записи, взявшие категорию FOR SHARE, и не пускает новые,
+    # пока из итогов не вычтены ее транзакции
+    category = await get_categories_id(db, category_id, current_user, for_update=True)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found or forbidden")
-    await db.delete(category)
+
+    # Транзакции категории удалятся каскадом в БД - вычитаем их из итогов
+    is_income = Transactions.transaction_type == TransactionType.INCOME
+    is_expense = Transactions.transaction_type == TransactionType.EXPENSE
+    result = await db.execute(
+        select(
+            func.coalesce(func.sum(Transactions.amount).filter(is_income), 0),
+            func.coalesce(func.sum(Transactions.amount).filter(is_expense), 0),
+            func.count().filter(is_income),
+            func.count().filter(is_expense),
+        ).where(Transactions.category_id == category_id)
+    )
+    income, expense, income_count, expense_count = result.one()
+    await db.execute(
+        update(Users)
+        .where(Users.id == current_user.id)
+        .values(
+            total_income=Users.total_income - income,
+            total_expense=Users.total_expense - expense,
+            income_count=Users.income_count - income_count,
+            expense_count=Users.expense_count - expense_count,
+            data_version=NEXT_DATA_VERSION,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+    # Core DELETE: каскад выполняет БД (ON DELETE CASCADE). db.delete() сначала
+    # обнулил бы category_id у транзакций и упал на NOT NULL
+    await db.execute(delete(Categories).where(Categories.id == category.id))
     await db.commit()
+    await invalidate(db, category_cache, current_user.id)
+    await data_version_changed(db, current_user.id)
     return category
@@ -0,0 +1,49 @@
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Users
+from app.core.cache import TTLCache
+from app.core.cache_invalidation import invalidate
+from app.core.config import settings
+from app.db import async_engine
+
+# user_id -> users.data_version: по нему GET-эндпоинты отдают ETag и 304
+# без запросов к БД
+data_version_cache = TTLCache(
+    "data_versions",
+    maxsize=settings.data_version_cache_size,
+    ttl=settings.data_version_cache_ttl,
+)
+
+# Для UPDATE users, который и так выполняется при записи (баланс, итоги)
+NEXT_DATA_VERSION = Users.data_version + 1
+
+
+async def bump_data_version(db: AsyncSession, user_id: int):
+    """Увеличивает версию данных пользователя в текущей транзакции"""
+    await db.execute(
+        update(Users)
+        .where(Users.id == user_id)
+        .values(data_version=NEXT_DATA_VERSION)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def data_version_changed(db: AsyncSession, user_id: int):
+    """Сбрасывает закэшированную версию во всех воркерах. Вызывать после commit"""
+    await invalidate(db, data_version_cache, user_id)
+
+
+async def get_data_version(db: AsyncSession, user_id: int) -> int:
+    version = data_version_cache.get(user_id)
+    if version is not None:
+        return version
+    generation = data_version_cache.generation
+    result = await db.execute(select(Users.data_version).where(Users.id == user_id))
+    version = result.scalar_one_or_none() or 0
+    # Версию, прочитанную с отстающей реплики, не кэшируем: иначе после ее
+    # догона клиент продолжал бы получать 304 на старые данные. Без рассылки
+    # инвалидации другие воркеры держали бы старую версию до TTL - тоже 304
+    if db.bind is async_engine and settings.cache_shared_invalidation:
+        data_version_cache.set(user_id, version, generation=generation)
+    return version
@@ -0,0 +1,134 @@
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import delete, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import DailyRollups
+from app.models.transaction import TransactionType
+
+# Строк в одном INSERT: 7 параметров на строку, у asyncpg лимит 32767 на запрос
+ROLLUP_INSERT_CHUNK = 1000
+
+
+class RollupDeltas:
+    """
+    Накопитель изменений daily_rollups для одной транзакции БД
+
+    add() вызывается на каждую добавленную (sign=1) или удаленную (sign=-1)
+    строку transactions; изменение строки - это удаление старой версии и
+    добавление новой. apply() пишет все изменения через INSERT ... ON CONFLICT
+    пачками по ROLLUP_INSERT_CHUNK строк
+    """
+
+    def __init__(self):
+        # (user_id, day, category_id) -> [income, expense, income_count, expense_count]
+        self._rows = defaultdict(lambda: [0.0, 0.0, 0, 0])
+
+    def add(
+        self,
+        user_id: int,
+        created_at: datetime,
+        category_id: int,
+        transaction_type: TransactionType,
+        amount: float,
+        sign: int = 1,
+    ):
+        row = self._rows[(user_id, created_at.date(), category_id)]
+        if transaction_type == TransactionType.INCOME:
+            row[0] += sign * amount
+            row[2] += sign
+        elif transaction_type == TransactionType.EXPENSE:
+            row[1] += sign * amount
+            row[3] += sign
+
+    def add_transaction(self, transaction, sign: int = 1):
+        self.add(
+            transaction.user_id,
+            transaction.created_at,
+            transaction.category_id,
+            transaction.transaction_type,
+            transaction.amount,
+            sign,
+        )
+
+    async def apply(self, db: AsyncSession):
+        # Ключи сортируем, чтобы параллельные транзакции брали блокировки
+        # строк в одном порядке и не упирались в deadlock
+        values = [
+            {
+                "user_id": user_id,
+                "day": day,
+                "category_id": category_id,
+                "income": income,
+                "expense": expense,
+                "income_count": income_count,
+                "expense_count": expense_count,
+            }
+            for (user_id, day, category_id), (
+                income,
+                expense,
+                income_count,
+                expense_count,
+            ) in sorted(self._rows.items())
+            if income_count or expense_count or income or expense
+        ]
+        self._rows.clear()
+        if not values:
+            return
+
+        for start in range(0, len(values), ROLLUP_INSERT_CHUNK):
+            stmt = insert(DailyRollups).values(
+                values[start : start + ROLLUP_INSERT_CHUNK]
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[
+                    DailyRollups.user_id,
+                    DailyRollups.day,
+                    DailyRollups.category_id,
+                ],
+                set_={
+                    "income": DailyRollups.income + stmt.excluded.income,
+                    "expense": DailyRollups.expense + stmt.excluded.expense,
+                    "income_count": DailyRollups.income_count
+                    + stmt.excluded.income_count,
+                    "expense_count": DailyRollups.expense_count
+                    + stmt.excluded.expense_count,
+                },
+            )
+            await db.execute(stmt)
+
+
+REBUILD_ROLLUPS_SQL = """
+    INSERT INTO daily_rollups
+        (user_id, day, category_id, income, expense, income_count, expense_count)
+    SELECT
+        user_id,
+        created_at::date,
+        category_id,
+        COALESCE(SUM(amount) FILTER (WHERE transaction_type = 'INCOME'), 0),
+        COALESCE(SUM(amount) FILTER (WHERE transaction_type = 'EXPENSE'), 0),
+        COUNT(*) FILTER (WHERE transaction_type = 'INCOME'),
+        COUNT(*) FILTER (WHERE transaction_type = 'EXPENSE')
+    FROM transactions
+    {where}
+    GROUP BY user_id, created_at::date, category_id
+"""
+
+
+async def rebuild_rollups(db: AsyncSession, user_id: int | None = None):
+    """Пересчитывает daily_rollups с нуля по transactions (всех или одного пользователя)"""
+    # SHARE блокирует запись в transactions до commit, чтобы не потерять
+    # изменения, сделанные во время пересчета
+    await db.execute(text("LOCK TABLE transactions IN SHARE MODE"))
+    if user_id is None:
+        await db.execute(delete(DailyRollups))
+        await db.execute(text(REBUILD_ROLLUPS_SQL.format(where="")))
+    else:
+        await db.execute(delete(DailyRollups).where(DailyRollups.user_id == user_id))
+        await db.execute(
+            text(REBUILD_ROLLUPS_SQL.format(where="WHERE user_id = :user_id")),
+            {"user_id": user_id},
+        )
+    await db.commit()
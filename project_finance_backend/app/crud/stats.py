@@ -1,10 +1,49 @@
-from datetime import date
+from datetime import date, datetime, time, timedelta
 
+from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, case
-from app.models import Transactions
+from sqlalchemy import select, func, cast, literal, literal_column, DateTime
+from app.models import DailyRollups, Transactions
 from app.models.transaction import TransactionType
 
+# Шаг ряда периодов для generate_series
+PERIOD_STEPS = {
+    "day": "interval '1 day'",
+    "week": "interval '1 week'",
+    "month": "interval '1 month'",
+    "quarter": "interval '3 months'",
+    "year": "interval '1 year'",
+}
+
+# Больше периодов в одном ряду не строим (10 лет по дням - уже 3653)
+STATS_SERIES_MAX_PERIODS = 1000
+
+
+def _period(group_by: str):
+    if group_by not in PERIOD_STEPS:
+        raise ValueError("Invalid group_by")
+    return func.date_trunc(group_by, cast(DailyRollups.day, DateTime))
+
+
+def count_periods(date_from: date, date_to: date, group_by: str) -> int:
+    """Сколько периодов group_by в ряду от начала периода date_from до date_to"""
+    if group_by == "day":
+        return (date_to - date_from).days + 1
+    if group_by == "week":
+        week_start = date_from - timedelta(days=date_from.weekday())
+        return (date_to - week_start).days // 7 + 1
+    months = (date_to.year - date_from.year) * 12 + date_to.month - date_from.month
+    if group_by == "month":
+        return months + 1
+    if group_by == "quarter":
+        return (
+            (date_to.month - 1) // 3
+            - (date_from.month - 1) // 3
+            + (date_to.year - date_from.year) * 4
+            + 1
+        )
+    return date_to.year - date_from.year + 1
+
 
 async def get_stats_for_period(
     db: AsyncSession,
@@ -13,43 +52,27 @@ async def get_stats_for_period(
     date_to: date,
     group_by: str,
 ):
+    # Читаем из daily_rollups: стоимость зависит от числа дней в периоде,
+    # а не от числа транзакций
     if group_by == "day":
-        period = func.date(Transactions.created_at)
-    elif group_by == "month":
-        period = func.date_trunc("month", Transactions.created_at)
-    elif group_by == "year":
-        period = func.date_trunc("year", Transactions.created_at)
+        period = DailyRollups.day
     else:
-        raise ValueError("Invalid group_by")
+        period = _period(group_by)
 
     query = (
         select(
             period.label("period"),
-            func.sum(
-                case(
-                    (
-                        Transactions.transaction_type == TransactionType.INCOME,
-                        Transactions.amount,
-                    ),
-                    else_=0,
-                )
-            ).label("income"),
-            func.sum(
-                case(
-                    (
-                        Transactions.transaction_type == TransactionType.EXPENSE,
-                        Transactions.amount,
-                    ),
-                    else_=0,
-                )
-            ).label("expense"),
+            func.sum(DailyRollups.income).label("income"),
+            func.sum(DailyRollups.expense).label("expense"),
         )
         .where(
-            Transactions.user_id == user_id,
-            Transactions.created_at >= date_from,
-            Transactions.created_at <= date_to,
+            DailyRollups.user_id == user_id,
+            DailyRollups.day >= date_from,
+            DailyRollups.day <= date_to,
         )
         .group_by(period)
+        # Строки, у которых все транзакции удалены, остаются с нулевыми счетчиками
+        .having(func.sum(DailyRollups.income_count + DailyRollups.expense_count) > 0)
         .order_by(period)
     )
 
@@ -64,3 +87,119 @@ async def get_stats_for_period(
         }
         for row in rows
     ]
+
+
+async def get_stats_series(
+    db: AsyncSession,
+    user_id: int,
+    date_from: date,
+    date_to: date,
+    group_by: str,
+):
+    """
+    Статистика в колоночном виде для графиков: periods[], income[], expense[]
+
+    Ряд периодов строится generate_series от начала периода date_from до date_to,
+    периоды без транзакций заполняются нулями. Пустой или слишком длинный
+    ряд (больше STATS_SERIES_MAX_PERIODS) - 422
+    """
+    period = _period(group_by)
+    if date_from > date_to:
+        raise HTTPException(
+            status_code=422, detail="date_from must not be later than date_to"
+        )
+    if count_periods(date_from, date_to, group_by) > STATS_SERIES_MAX_PERIODS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Too many periods, max {STATS_SERIES_MAX_PERIODS}",
+        )
+    totals = (
+        select(
+            period.label("period"),
+            func.sum(DailyRollups.income).label("income"),
+            func.sum(DailyRollups.expense).label("expense"),
+        )
+        .where(
+            DailyRollups.user_id == user_id,
+            DailyRollups.day >= date_from,
+            DailyRollups.day <= date_to,
+        )
+        .group_by(period)
+        .subquery()
+    )
+    periods = (
+        func.generate_series(
+            func.date_trunc(
+                group_by, literal(datetime.combine(date_from, time()), DateTime)
+            ),
+            literal(datetime.combine(date_to, time()), DateTime),
+            literal_column(PERIOD_STEPS[group_by]),
+        )
+        .table_valued("period")
+        .render_derived(name="periods")
+    )
+
+    query = (
+        select(
+            periods.c.period,
+            func.coalesce(totals.c.income, 0).label("income"),
+            func.coalesce(totals.c.expense, 0).label("expense"),
+        )
+        .select_from(periods.outerjoin(totals, totals.c.period == periods.c.period))
+        .order_by(periods.c.period)
+    )
+
+    result = await db.execute(query)
+    series = {"periods": [], "income": [], "expense": []}
+    for row in result:
+        series["periods"].append(row.period.date().isoformat())
+        series["income"].append(row.income)
+        series["expense"].append(row.expense)
+    return series
+
+
+async def get_stats_summary(
+    db: AsyncSession,
+    user_id: int,
+    date_from: date | None = None,
+    date_to: date | None = None,
+):
+    """
+    Итоги за период одним агрегатом с FILTER по транзакциям пользователя
+
+    Читает только (user_id, created_at, amount, transaction_type), что
+    покрывается индексом ix_transactions_user_id_created_at_covering
+    """
+    is_income = Transactions.transaction_type == TransactionType.INCOME
+    is_expense = Transactions.transaction_type == TransactionType.EXPENSE
+    query = select(
+        func.coalesce(func.sum(Transactions.amount).filter(is_income), 0).label(
+            "total_income"
+        ),
+        func.coalesce(func.sum(Transactions.amount).filter(is_expense), 0).label(
+            "total_expense"
+        ),
+        func.count().filter(is_income).label("income_count"),
+        func.count().filter(is_expense).label("expense_count"),
+    ).where(Transactions.user_id == user_id)
+    if date_from is not None:
+        query = query.where(
+            Transactions.created_at >= datetime.combine(date_from, time())
+        )
+    if date_to is not None:
+        query = query.where(
+            Transactions.created_at
+            < datetime.combine(date_to + timedelta(days=1), time())
+        )
+
+    row = (await db.execute(query)).one()
+    return {
+        "total_income": row.total_income,
+        "total_expense": row.total_expense,
+        "balance": row.total_income - row.total_expense,
+        "transactions_count": row.income_count + row.expense_count,
+        "income_count": row.income_count,
+        "expense_count": row.expense_count,
+        "period_start": date_from,
+        "period_end": date_to,
+    }
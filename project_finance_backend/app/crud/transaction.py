@@ -1,10 +1,92 @@
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update, delete, func, cast, DateTime
 from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from app.models.transaction import Transactions, TransactionType
-from app.schemas.transactions import TransactionCreate, UpdateTransaction
-from app.models import Users, Categories
+from app.schemas.transactions import (
+    TransactionCreate,
+    UpdateTransaction,
+    TransactionBatch,
+)
+from app.models import Users, Categories, DailyRollups
+from app.crud.rollup import RollupDeltas
+from app.crud.category import lock_user_categories
+from app.crud.data_version import (
+    NEXT_DATA_VERSION,
+    bump_data_version,
+    data_version_changed,
+)
+
+
+@dataclass
+class TotalsDelta:
+    """Изменение баланса и lifetime-итогов пользователя"""
+
+    income: float = 0.0
+    expense: float = 0.0
+    income_count: int = 0
+    expense_count: int = 0
+
+    def add(self, transaction_type: TransactionType, amount: float, sign: int = 1):
+        if transaction_type == TransactionType.INCOME:
+            self.income += sign * amount
+            self.income_count += sign
+        elif transaction_type == TransactionType.EXPENSE:
+            self.expense += sign * amount
+            self.expense_count += sign
+
+    @property
+    def balance(self) -> float:
+        return self.income - self.expense
+
+
+async def apply_totals_delta(
+    db: AsyncSession, current_user: Users, totals: TotalsDelta
+) -> tuple[float, datetime]:
+    """
+    Атомарно меняет баланс и итоги в БД: UPDATE ... SET balance = balance + delta
+
+    Конкурентные запросы (веб-приложение и бот) не затирают друг друга,
+    т.к. значения не вычисляются в Python. Возвращает новый баланс и
+    LOCALTIMESTAMP транзакции - то же значение, что server_default now()
+    подставит в created_at
+    """
+    result = await db.execute(
+        update(Users)
+        .where(Users.id == current_user.id)
+        .values(
+            balance=Users.balance + totals.balance,
+            total_income=Users.total_income + totals.income,
+            total_expense=Users.total_expense + totals.expense,
+            income_count=Users.income_count + totals.income_count,
+            expense_count=Users.expense_count + totals.expense_count,
+            data_version=NEXT_DATA_VERSION,
+        )
+        .returning(
+            Users.balance,
+            Users.total_income,
+            Users.total_expense,
+            Users.income_count,
+            Users.expense_count,
+            func.localtimestamp().label("now"),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    row = result.one()
+    # Обновляем загруженный объект, не помечая его измененным
+    for key in (
+        "balance",
+        "total_income",
+        "total_expense",
+        "income_count",
+        "expense_count",
+    ):
+        set_committed_value(current_user, key, getattr(row, key))
+    return row.balance, row.now
 
 
 async def create_transaction(
@@ -14,28 +96,159 @@ async def create_transaction(
         **transaction_create.model_dump(exclude={"user_id"}), user_id=current_user.id
     )
 
-    category = await db.execute(
-        select(Categories).where(
-            Categories.id == transaction_create.category_id,
-            Categories.user_id == current_user.id,
-        )
+    categories = await lock_user_categories(
+        db, current_user.id, {transaction_create.category_id}
     )
-    category = category.scalar_one_or_none()
+    category = categories.get(transaction_create.category_id)
 
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
 
-    if new_transaction_obj.transaction_type == TransactionType.INCOME:
-        current_user.balance += new_transaction_obj.amount
-    elif new_transaction_obj.transaction_type == TransactionType.EXPENSE:
-        current_user.balance -= new_transaction_obj.amount
+    totals = TotalsDelta()
+    totals.add(new_transaction_obj.transaction_type, new_transaction_obj.amount)
+    _, now = await apply_totals_delta(db, current_user, totals)
+    new_transaction_obj.created_at = now
+
+    rollups = RollupDeltas()
+    rollups.add_transaction(new_transaction_obj)
+    await rollups.apply(db)
 
     db.add(new_transaction_obj)
     await db.commit()
-    await db.refresh(new_transaction_obj, ["category"])
+    await data_version_changed(db, current_user.id)
+    set_committed_value(new_transaction_obj, "category", category)
     return new_transaction_obj
 
 
+def transaction_rows_query(user_id: int):
+    """SELECT полей ReadTransaction с категорией одним JOIN, без ORM-объектов"""
+    return (
+        select(
+            Transactions.id,
+            Transactions.amount,
+            Transactions.category_id,
+            Transactions.transaction_type,
+            Transactions.description,
+            Transactions.created_at,
+            Categories.name.label("category_name"),
+            Categories.type.label("category_type"),
+            Categories.color.label("category_color"),
+            Categories.icon.label("category_icon"),
+        )
+        .outerjoin(Categories, Categories.id == Transactions.category_id)
+        .where(Transactions.user_id == user_id)
+    )
+
+
+def filter_transactions(
+    query,
+    category_id: int | None = None,
+    transaction_type: TransactionType | None = None,
+    amount_min: float | None = None,
+    amount_max: float | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    search: str | None = None,
+):
+    """
+    Добавляет к запросу фильтры списка транзакций
+
+    category_id и transaction_type идут по индексам (user_id, ..., created_at),
+    search - ILIKE по описанию через триграммный GIN-индекс
+    """
+    if category_id is not None:
+        query = query.where(Transactions.category_id == category_id)
+    if transaction_type is not None:
+        query = query.where(Transactions.transaction_type == transaction_type)
+    if amount_min is not None:
+        query = query.where(Transactions.amount >= amount_min)
+    if amount_max is not None:
+        query = query.where(Transactions.amount <= amount_max)
+    if date_from is not None:
+        query = query.where(
+            Transactions.created_at >= datetime.combine(date_from, time())
+        )
+    if date_to is not None:
+        query = query.where(
+            Transactions.created_at
+            < datetime.combine(date_to + timedelta(days=1), time())
+        )
+    if search:
+        pattern = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        query = query.where(Transactions.description.ilike(f"%{pattern}%", escape="\\"))
+    return query
+
+
+def transaction_row_to_dict(row) -> dict:
+    return {
+        "id": row.id,
+        "amount": row.amount,
+        "category_id": row.category_id,
+        "transaction_type": row.transaction_type,
+        "description": row.description,
+        "created_at": row.created_at,
+        "category": (
+            {
+                "id": row.category_id,
+                "name": row.category_name,
+                "type": row.category_type,
+                "color": row.category_color,
+                "icon": row.category_icon,
+            }
+            if row.category_name is not None
+            else None
+        ),
+    }
+
+
+async def get_transactions_by_day(
+    db: AsyncSession, user_id: int, days: int, before: date | None = None
+) -> list[dict]:
+    """
+    Транзакции за последние days дней (до before, не включая), по дням
+
+    Границу окна дает daily_rollups (не больше days строк по ключу
+    (user_id, day)), сами транзакции читаются одним запросом по индексу
+    (user_id, created_at DESC, id DESC) - объем зависит от показанных дней,
+    а не от всей истории
+    """
+    window = (
+        select(DailyRollups.day)
+        .where(DailyRollups.user_id == user_id)
+        .group_by(DailyRollups.day)
+        .having(func.sum(DailyRollups.income_count + DailyRollups.expense_count) > 0)
+        .order_by(DailyRollups.day.desc())
+        .limit(days)
+    )
+    if before is not None:
+        window = window.where(DailyRollups.day < before)
+    first_day = select(func.min(window.subquery().c.day)).scalar_subquery()
+
+    query = (
+        transaction_rows_query(user_id)
+        .where(Transactions.created_at >= cast(first_day, DateTime))
+        .order_by(Transactions.created_at.desc(), Transactions.id.desc())
+    )
+    if before is not None:
+        query = query.where(Transactions.created_at < datetime.combine(before, time()))
+
+    result = await db.execute(query)
+    day_groups: list[dict] = []
+    for row in result:
+        day = row.created_at.date()
+        if not day_groups or day_groups[-1]["day"] != day:
+            day_groups.append(
+                {"day": day, "income": 0.0, "expense": 0.0, "transactions": []}
+            )
+        group = day_groups[-1]
+        if row.transaction_type == TransactionType.INCOME:
+            group["income"] += row.amount
+        elif row.transaction_type == TransactionType.EXPENSE:
+            group["expense"] += row.amount
+        group["transactions"].append(transaction_row_to_dict(row))
+    return day_groups
+
+
 async def get_transactions(db: AsyncSession, skip: int = 0, limit: int = 100):
     query = select(Transactions).offset(skip).limit(limit)
     result = await db.execute(query)
@@ -48,13 +261,18 @@ async def get_transactions_id(db: AsyncSession, transaction_id: int):
     return result.scalar_one_or_none()
 
 
-async def update_transaction(
-    current_user: Users,
-    db: AsyncSession,
-    transaction_id: int,
-    transaction_data: UpdateTransaction,
-):
-    db_transaction = await get_transactions_id(db, transaction_id)
+async def _get_transaction_for_update(
+    db: AsyncSession, transaction_id: int, current_user: Users
+) -> Transactions:
+    # FOR UPDATE: параллельное изменение той же транзакции ждет нашего commit,
+    # иначе дельта баланса считалась бы от устаревших amount/type
+    result = await db.execute(
+        select(Transactions)
+        .where(Transactions.id == transaction_id)
+        .options(selectinload(Transactions.category))
+        .with_for_update(of=Transactions)
+    )
+    db_transaction = result.scalar_one_or_none()
 
     if not db_transaction:
         raise HTTPException(status_code=404, detail="Transaction not found")
@@ -62,47 +280,219 @@ async def update_transaction(
     if db_transaction.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Forbidden")
 
+    return db_transaction
+
+
+# Поля транзакции, которые нельзя обнулить частичным обновлением
+_NOT_NULL_UPDATE_FIELDS = ("category_id", "amount", "transaction_type")
+
+
+def _check_update_data(update_data: dict) -> str | None:
+    """
+    Проверяет частичное обновление и приводит transaction_type к enum
+
+    Возвращает текст ошибки или None
+    """
+    for key in _NOT_NULL_UPDATE_FIELDS:
+        if key in update_data and update_data[key] is None:
+            return f"{key} must not be null"
+    if update_data.get("amount", 0) < 0:
+        return "amount must not be negative"
+    if "transaction_type" in update_data:
+        try:
+            update_data["transaction_type"] = TransactionType(
+                update_data["transaction_type"]
+            )
+        except ValueError:
+            return "Invalid transaction_type"
+    return None
+
+
+async def update_transaction(
+    current_user: Users,
+    db: AsyncSession,
+    transaction_id: int,
+    transaction_data: UpdateTransaction,
+):
+    db_transaction = await _get_transaction_for_update(db, transaction_id, current_user)
+
     updated_transaction = transaction_data.model_dump(exclude_unset=True)
+    error = _check_update_data(updated_transaction)
+    if error:
+        raise HTTPException(status_code=422, detail=error)
+
+    category = None
+    if (
+        "category_id" in updated_transaction
+        and updated_transaction["category_id"] != db_transaction.category_id
+    ):
+        categories = await lock_user_categories(
+            db, current_user.id, {updated_transaction["category_id"]}
+        )
+        category = categories.get(updated_transaction["category_id"])
+        if not category:
+            raise HTTPException(status_code=404, detail="Category not found")
 
-    if db_transaction.transaction_type == TransactionType.INCOME:
-        current_user.balance -= db_transaction.amount
-    elif db_transaction.transaction_type == TransactionType.EXPENSE:
-        current_user.balance += db_transaction.amount
+    totals = TotalsDelta()
+    totals.add(db_transaction.transaction_type, db_transaction.amount, sign=-1)
+    rollups = RollupDeltas()
+    rollups.add_transaction(db_transaction, sign=-1)
 
     for key, value in updated_transaction.items():
         setattr(db_transaction, key, value)
 
-    if db_transaction.transaction_type == TransactionType.INCOME:
-        current_user.balance += db_transaction.amount
-    elif db_transaction.transaction_type == TransactionType.EXPENSE:
-        current_user.balance -= db_transaction.amount
+    totals.add(db_transaction.transaction_type, db_transaction.amount)
+    rollups.add_transaction(db_transaction)
 
-    db.add(db_transaction)
-    db.add(current_user)
+    if totals != TotalsDelta():
+        await apply_totals_delta(db, current_user, totals)
+    else:
+        await bump_data_version(db, current_user.id)
+    await rollups.apply(db)
     await db.commit()
-    await db.refresh(db_transaction)
+    await data_version_changed(db, current_user.id)
+    if category is not None:
+        set_committed_value(db_transaction, "category", category)
     return db_transaction
 
 
 async def delete_transaction(
     current_user: Users, db: AsyncSession, transaction_id: int
 ):
-    db_transaction = await get_transactions_id(db, transaction_id)
-    if not db_transaction:
-        raise HTTPException(status_code=404, detail="Transaction not found")
-
-    # Проверяем, что транзакция принадлежит текущему пользователю
-    if db_transaction.user_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Forbidden")
+    db_transaction = await _get_transaction_for_update(db, transaction_id, current_user)
 
     # Обновляем баланс пользователя
-    if db_transaction.transaction_type == TransactionType.INCOME:
-        current_user.balance -= db_transaction.amount
-    elif db_transaction.transaction_type == TransactionType.EXPENSE:
-        current_user.balance += db_transaction.amount
+    totals = TotalsDelta()
+    totals.add(db_transaction.transaction_type, db_transaction.amount, sign=-1)
+    await apply_totals_delta(db, current_user, totals)
+    rollups = RollupDeltas()
+    rollups.add_transaction(db_transaction, sign=-1)
+    await rollups.apply(db)
 
     # Удаляем транзакцию (правильный синтаксис для async SQLAlchemy 2.0)
     await db.delete(db_transaction)
-    db.add(current_user)
     await db.commit()
+    await data_version_changed(db, current_user.id)
     return db_transaction
+
+
+async def apply_transaction_batch(
+    current_user: Users, db: AsyncSession, batch: TransactionBatch
+):
+    """
+    Выполняет пачку create/update/delete в одной транзакции БД
+
+    Транзакции и категории читаются одним запросом на всю пачку, баланс
+    меняется одним UPDATE на суммарную дельту. Невалидные операции
+    пропускаются, их ошибки возвращаются в результатах по индексу
+    """
+    operations = batch.operations
+    # Категории блокируем до транзакций - в том же порядке, что delete_category
+    category_ids = {
+        op.data.category_id
+        for op in operations
+        if op.op != "delete" and op.data.category_id is not None
+    }
+    categories: dict[int, Categories] = await lock_user_categories(
+        db, current_user.id, category_ids
+    )
+
+    target_ids = {op.id for op in operations if op.op != "create"}
+    existing: dict[int, Transactions] = {}
+    if target_ids:
+        result = await db.execute(
+            select(Transactions)
+            .where(
+                Transactions.id.in_(target_ids),
+                Transactions.user_id == current_user.id,
+            )
+            .options(selectinload(Transactions.category))
+            .with_for_update(of=Transactions)
+        )
+        existing = {t.id: t for t in result.scalars().all()}
+
+    results: list[dict] = []
+    created: list[tuple[dict, Transactions]] = []
+    updated: list[tuple[dict, Transactions]] = []
+    deleted_ids: set[int] = set()
+    totals = TotalsDelta()
+    rollups = RollupDeltas()
+
+    for index, op in enumerate(operations):
+        item = {"index": index, "op": op.op, "ok": False}
+        results.append(item)
+
+        if op.op == "create":
+            category = categories.get(op.data.category_id)
+            if category is None:
+                item["error"] = "Category not found"
+                continue
+            new_transaction = Transactions(
+                **op.data.model_dump(), user_id=current_user.id
+            )
+            totals.add(new_transaction.transaction_type, new_transaction.amount)
+            created.append((item, new_transaction))
+            item["ok"] = True
+            continue
+
+        db_transaction = existing.get(op.id)
+        item["id"] = op.id
+        if db_transaction is None or op.id in deleted_ids:
+            item["error"] = "Transaction not found"
+            continue
+
+        if op.op == "delete":
+            totals.add(db_transaction.transaction_type, db_transaction.amount, sign=-1)
+            rollups.add_transaction(db_transaction, sign=-1)
+            deleted_ids.add(op.id)
+            item["ok"] = True
+            continue
+
+        update_data = op.data.model_dump(exclude_unset=True)
+        error = _check_update_data(update_data)
+        if error:
+            item["error"] = error
+            continue
+        if (
+            "category_id" in update_data
+            and update_data["category_id"] not in categories
+        ):
+            item["error"] = "Category not found"
+            continue
+
+        totals.add(db_transaction.transaction_type, db_transaction.amount, sign=-1)
+        rollups.add_transaction(db_transaction, sign=-1)
+        for key, value in update_data.items():
+            setattr(db_transaction, key, value)
+        totals.add(db_transaction.transaction_type, db_transaction.amount)
+        rollups.add_transaction(db_transaction)
+        updated.append((item, db_transaction))
+        item["ok"] = True
+
+    # created_at берем из той же транзакции БД, чтобы не перечитывать строки
+    balance, now = await apply_totals_delta(db, current_user, totals)
+
+    for _, new_transaction in created:
+        new_transaction.created_at = now
+        rollups.add_transaction(new_transaction)
+    await rollups.apply(db)
+    db.add_all([new_transaction for _, new_transaction in created])
+    if deleted_ids:
+        await db.execute(
+            delete(Transactions)
+            .where(Transactions.id.in_(deleted_ids))
+            .execution_options(synchronize_session=False)
+        )
+        for transaction_id in deleted_ids:
+            db.expunge(existing[transaction_id])
+    await db.commit()
+    await data_version_changed(db, current_user.id)
+
+    for item, transaction_obj in created + updated:
+        if transaction_obj.category_id in categories:
+            set_committed_value(
+                transaction_obj, "category", categories[transaction_obj.category_id]
+            )
+        item["id"] = transaction_obj.id
+        item["transaction"] = transaction_obj
+    return {"results": results, "balance": balance}
@@ -1,11 +1,52 @@
-from sqlalchemy import select
+from dataclasses import dataclass
+
+from sqlalchemy import select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import Users
 from app.schemas.users import CreateUser, UpdateUser
+from app.core.pagination import decode_cursor
+from app.core.cache import TTLCache
+from app.core.cache_invalidation import invalidate
+from app.core.config import settings
+from app.core.password_hashing import run_in_password_pool
+from app.crud.data_version import NEXT_DATA_VERSION, data_version_changed
 
 import bcrypt
 
 
+@dataclass(frozen=True, slots=True)
+class UserIdentity:
+    """Минимум о пользователе для авторизации без чтения из БД"""
+
+    id: int
+    is_admin: bool
+
+
+# user_id -> UserIdentity; сбрасывается при изменении или удалении пользователя
+identity_cache = TTLCache(
+    "users", maxsize=settings.user_cache_size, ttl=settings.user_cache_ttl
+)
+
+
+async def get_user_identity(db: AsyncSession, user_id: int) -> UserIdentity | None:
+    identity = identity_cache.get(user_id)
+    if identity is not None:
+        return identity
+    result = await db.execute(
+        select(Users.id, Users.is_admin).where(Users.id == user_id)
+    )
+    row = result.one_or_none()
+    if row is None:
+        return None
+    identity = UserIdentity(id=row.id, is_admin=bool(row.is_admin))
+    identity_cache.set(user_id, identity)
+    return identity
+
+
+def cache_user_identity(user: Users):
+    identity_cache.set(user.id, UserIdentity(id=user.id, is_admin=bool(user.is_admin)))
+
+
 def get_hash_password(password: str) -> str:
     pwd_bytes = password.encode("utf-8")
     salt = bcrypt.gensalt()
@@ -19,9 +60,21 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     )
 
 
+# Асинхронные варианты: bcrypt выполняется в отдельном пуле потоков,
+# чтобы не блокировать event loop
+async def get_hash_password_async(password: str) -> str:
+    return await run_in_password_pool(get_hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await run_in_password_pool(verify_password, plain_password, hashed_password)
+
+
 async def create_user(db: AsyncSession, user_data: CreateUser):
     db_user = user_data.model_dump(exclude_unset=True)
-    db_user["hashed_password"] = get_hash_password(user_data.hashed_password)
+    db_user["hashed_password"] = await get_hash_password_async(
+        user_data.hashed_password
+    )
     
     # Если username не указан, генерируем его из email
     if not db_user.get("username"):
@@ -49,10 +102,29 @@ async def create_user(db: AsyncSession, user_data: CreateUser):
     return user
 
 
-async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100):
-    query = select(Users).offset(skip).limit(limit)
+async def get_users(
+    db: AsyncSession, skip: int = 0, limit: int = 100, cursor: str | None = None
+):
+    # Только поля ReadUser, строками без ORM-объектов (список для админки)
+    query = (
+        select(
+            Users.id,
+            Users.username,
+            Users.email,
+            Users.balance,
+            Users.is_admin,
+            Users.created_at,
+        )
+        .order_by(Users.id)
+        .limit(limit)
+    )
+    if cursor:
+        (last_id,) = decode_cursor(cursor, int)
+        query = query.where(Users.id > last_id)
+    else:
+        query = query.offset(skip)
     result = await db.execute(query)
-    return result.scalars().all()
+    return [dict(row) for row in result.mappings()]
 
 
 async def get_users_id(db: AsyncSession, user_id: int):
@@ -70,16 +142,19 @@ async def update_user(db: AsyncSession, user_id: int, user_data: UpdateUser):
 
     # если приходит новый пароль, хэшируем его и сохраняем в hashed_password
     if "hashed_password" in update_data and update_data["hashed_password"]:
-        update_data["hashed_password"] = get_hash_password(
+        update_data["hashed_password"] = await get_hash_password_async(
             update_data.pop("hashed_password")
         )
 
     for key, value in update_data.items():
         setattr(db_user, key, value)
+    db_user.data_version = NEXT_DATA_VERSION
 
     db.add(db_user)
     await db.commit()
     await db.refresh(db_user)
+    await invalidate(db, identity_cache, user_id)
+    await data_version_changed(db, user_id)
     return db_user
 
 
@@ -89,19 +164,59 @@ async def delete_user(db: AsyncSession, user_id: int):
         return None
     await db.delete(db_user)
     await db.commit()
+    await invalidate(db, identity_cache, user_id)
     return db_user
 
 
 async def get_user_by_telegram_id(db: AsyncSession, telegram_id: int):
     """Получить пользователя по Telegram ID"""
-    username = f"tg_{telegram_id}"
-    query = select(Users).where(Users.username == username)
+    query = select(Users).where(Users.telegram_id == telegram_id)
     result = await db.execute(query)
     return result.scalar_one_or_none()
 
 
-async def get_all_telegram_users(db: AsyncSession):
-    """Получить всех пользователей с Telegram аккаунтами"""
-    query = select(Users).where(Users.username.like("tg_%"))
+async def get_all_telegram_ids(db: AsyncSession) -> list[int]:
+    """Telegram ID всех пользователей с привязанным Telegram (index-only scan)"""
+    query = select(Users.telegram_id).where(Users.telegram_id.is_not(None))
     result = await db.execute(query)
-    return result.scalars().all()
\ No newline at end of file
+    return result.scalars().all()
+
+
+RECOMPUTE_TOTALS_SQL = """
+    UPDATE users u SET
+        total_income = COALESCE(s.total_income, 0),
+        total_expense = COALESCE(s.total_expense, 0),
+        income_count = COALESCE(s.income_count, 0),
+        expense_count = COALESCE(s.expense_count, 0)
+    FROM users target
+    LEFT JOIN (
+        SELECT
+            user_id,
+            SUM(amount) FILTER (WHERE transaction_type = 'INCOME') AS total_income,
+            SUM(amount) FILTER (WHERE transaction_type = 'EXPENSE') AS total_expense,
+            COUNT(*) FILTER (WHERE transaction_type = 'INCOME') AS income_count,
+            COUNT(*) FILTER (WHERE transaction_type = 'EXPENSE') AS expense_count
+        FROM transactions
+        {where}
+        GROUP BY user_id
+    ) s ON s.user_id = target.id
+    WHERE u.id = target.id {and_user}
+"""
+
+
+async def recompute_user_totals(db: AsyncSession, user_id: int | None = None):
+    """Пересчитывает total_income/total_expense/счетчики по transactions"""
+    if user_id is None:
+        query = text(RECOMPUTE_TOTALS_SQL.format(where="", and_user=""))
+        params = {}
+    else:
+        query = text(
+            RECOMPUTE_TOTALS_SQL.format(
+                where="WHERE user_id = :user_id", and_user="AND u.id = :user_id"
+            )
+        )
+        params = {"user_id": user_id}
+    # Блокируем запись в transactions до commit, чтобы итоги не разошлись
+    await db.execute(text("LOCK TABLE transactions IN SHARE MODE"))
+    await db.execute(query, params)
+    await db.commit()
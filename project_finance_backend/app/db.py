@@ -1,9 +1,185 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from uuid import uuid4
+
 from app.core.config import settings
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    create_async_engine,
+    async_sessionmaker,
+    AsyncSession,
+)
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+@dataclass
+class PoolWaitStats:
+    """Сколько запросы ждали свободное соединение из пула"""
+
+    checkouts: int = 0
+    timeouts: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    def record(self, wait: float, timed_out: bool = False):
+        self.checkouts += 1
+        self.total_wait += wait
+        if wait > self.max_wait:
+            self.max_wait = wait
+        if timed_out:
+            self.timeouts += 1
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool, который замеряет время ожидания соединения"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
 
-async_engine = create_async_engine(settings.database_url, echo=False)
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.wait_stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+
+def _connect_args() -> dict:
+    if settings.db_transaction_pooler:
+        # PgBouncer в режиме transaction pooling не гарантирует, что следующий
+        # запрос попадет на тот же backend, поэтому кэшировать prepared
+        # statements нельзя, а их имена должны быть уникальными
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    return {"prepared_statement_cache_size": settings.db_statement_cache_size}
+
+
+def build_engine(database_url: str) -> AsyncEngine:
+    """Создает async engine с настройками пула из Settings"""
+    return create_async_engine(
+        database_url,
+        echo=False,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args=_connect_args(),
+    )
+
+
+async_engine = build_engine(settings.database_url)
 
 AsyncSessionLocal = async_sessionmaker(
     async_engine,
     expire_on_commit=False,
 )
+
+# Опциональная реплика: используется только для чтения через get_read_db
+replica_engine: AsyncEngine | None = (
+    build_engine(settings.database_replica_url)
+    if settings.database_replica_url
+    else None
+)
+
+ReplicaSessionLocal = (
+    async_sessionmaker(replica_engine, expire_on_commit=False)
+    if replica_engine is not None
+    else None
+)
+
+_MAX_RECENT_WRITERS = 10_000
+_recent_writers: dict[str, float] = {}
+_replica_down_until = 0.0
+
+
+def mark_recent_write(client_key: str):
+    """Запоминает, что клиент только что писал: его чтения идут на primary"""
+    now = time.monotonic()
+    if len(_recent_writers) >= _MAX_RECENT_WRITERS:
+        for key, until in list(_recent_writers.items()):
+            if until <= now:
+                del _recent_writers[key]
+        if len(_recent_writers) >= _MAX_RECENT_WRITERS:
+            _recent_writers.clear()
+    _recent_writers[client_key] = now + settings.db_replica_sticky_seconds
+
+
+def is_recent_writer(client_key: str | None) -> bool:
+    if not client_key:
+        return False
+    until = _recent_writers.get(client_key)
+    if until is None:
+        return False
+    if until <= time.monotonic():
+        _recent_writers.pop(client_key, None)
+        return False
+    return True
+
+
+def mark_replica_down():
+    global _replica_down_until
+    _replica_down_until = time.monotonic() + settings.db_replica_retry_seconds
+
+
+def replica_available() -> bool:
+    return ReplicaSessionLocal is not None and time.monotonic() >= _replica_down_until
+
+
+async def warm_up_pool(engine: AsyncEngine, connections: int):
+    """Открывает connections соединений заранее, чтобы первые запросы не ждали"""
+    opened = await asyncio.gather(
+        *(engine.connect().start() for _ in range(connections)), return_exceptions=True
+    )
+    errors = [conn for conn in opened if isinstance(conn, BaseException)]
+    for conn in opened:
+        if isinstance(conn, BaseException):
+            continue
+        try:
+            await conn.execute(text("SELECT 1"))
+        finally:
+            await conn.close()
+    if errors:
+        raise errors[0]
+
+
+def get_pool_stats(engine: AsyncEngine) -> dict:
+    """Текущее состояние пула соединений"""
+    pool = engine.pool
+    stats = {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": settings.db_max_overflow,
+    }
+    wait_stats = getattr(pool, "wait_stats", None)
+    if wait_stats is not None:
+        stats.update(
+            {
+                "checkouts": wait_stats.checkouts,
+                "timeouts": wait_stats.timeouts,
+                "avg_wait_ms": (
+                    wait_stats.total_wait / wait_stats.checkouts * 1000
+                    if wait_stats.checkouts
+                    else 0.0
+                ),
+                "max_wait_ms": wait_stats.max_wait * 1000,
+            }
+        )
+    return stats
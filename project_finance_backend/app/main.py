@@ -1,7 +1,7 @@
 import asyncio
 import logging
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
 # Настройка логирования
@@ -18,6 +18,20 @@ from app.routers.auth import router as auth_router
 from app.routers.profile import router as profile_router
 from app.routers.stats import router as stats_router
 from app.routers.telegram import router as telegram_router
+from app.routers.metrics import router as metrics_router
+from app.core.config import settings
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.db import async_engine, replica_engine, warm_up_pool, mark_recent_write
+from app.core.cache_invalidation import (
+    start_invalidation_listener,
+    stop_invalidation_listener,
+)
+from app.core.password_hashing import shutdown_password_pool
+from app.bot.services.speech_recognition import (
+    shutdown_transcription_pool,
+    warm_up_transcription,
+)
+from app.bot.services.transcription_queue import transcription_queue
 from app.bot.bot import setup_bot, shutdown_bot, dp, bot
 from app.bot.scheduler import start_scheduler, shutdown_scheduler
 
@@ -27,7 +41,6 @@ from app.bot.scheduler import start_scheduler, shutdown_scheduler
 async def lifespan(app: FastAPI):
     # --- БЛОК СОЗДАНИЯ ТАБЛИЦ ---
     try:
-        from app.db import async_engine  # У тебя файл app/db.py, а не папка
         from app.models.base import Base # Base у тебя в app/models/base.py
         
         async with async_engine.begin() as conn:
@@ -36,6 +49,27 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"DATABASE ERROR: {e}")
     # ----------------------------
+    if settings.db_pool_warmup:
+        try:
+            await warm_up_pool(async_engine, settings.db_pool_size)
+            logger.info(
+                f"DATABASE: pool warmed up ({settings.db_pool_size} connections)"
+            )
+        except Exception as e:
+            logger.error(f"DATABASE POOL WARMUP ERROR: {e}")
+        if replica_engine is not None:
+            try:
+                await warm_up_pool(replica_engine, settings.db_pool_size)
+            except Exception as e:
+                logger.error(f"DATABASE REPLICA WARMUP ERROR: {e}")
+    try:
+        await start_invalidation_listener()
+    except Exception as e:
+        logger.error(f"CACHE INVALIDATION LISTENER ERROR: {e}")
+    warmup_task = None
+    if settings.whisper_warmup:
+        # В фоне: старт API не ждет загрузки torch и модели
+        warmup_task = asyncio.create_task(warm_up_transcription())
     await setup_bot()
     bot_task = asyncio.create_task(dp.start_polling(bot, drop_pending_updates=True))
     
@@ -55,6 +89,17 @@ async def lifespan(app: FastAPI):
     except asyncio.CancelledError:
         pass
 
+    if warmup_task is not None:
+        warmup_task.cancel()
+
+    await stop_invalidation_listener()
+    shutdown_password_pool()
+    transcription_queue.stop()
+    shutdown_transcription_pool()
+    await async_engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
+
 
 app = FastAPI(lifespan=lifespan)
 
@@ -66,8 +111,25 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
+# После успешной записи клиент какое-то время читает с primary,
+# чтобы не увидеть устаревшие данные с реплики
+@app.middleware("http")
+async def stick_writers_to_primary(request: Request, call_next):
+    response = await call_next(request)
+    if (
+        replica_engine is not None
+        and request.method not in ("GET", "HEAD", "OPTIONS")
+        and response.status_code < 400
+    ):
+        authorization = request.headers.get("authorization")
+        if authorization:
+            mark_recent_write(authorization)
+    return response
+
+
 # Routers
 app.include_router(category_router)
 app.include_router(transaction_router)
@@ -76,3 +138,4 @@ app.include_router(auth_router)
 app.include_router(profile_router)
 app.include_router(stats_router)
 app.include_router(telegram_router)
+app.include_router(metrics_router)
@@ -2,3 +2,4 @@ from .base import Base
 from .user import Users
 from .category import Categories
 from .transaction import Transactions
+from .daily_rollup import DailyRollups
@@ -0,0 +1,23 @@
+from .base import Base
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Integer, ForeignKey, Date, Float, Index
+from datetime import date
+
+
+class DailyRollups(Base):
+    """Суммы доходов/расходов пользователя за день по категории (для /stats)"""
+
+    __tablename__ = "daily_rollups"
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    category_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True
+    )
+    income: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+    expense: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+    income_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    expense_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    __table_args__ = (Index("ix_daily_rollups_category_id", "category_id"),)
@@ -1,6 +1,18 @@
 from .base import Base
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Integer, ForeignKey, DateTime, Float, func, Enum
+from sqlalchemy import (
+    String,
+    Integer,
+    ForeignKey,
+    DateTime,
+    Float,
+    func,
+    Enum,
+    Index,
+    text,
+    event,
+    DDL,
+)
 from datetime import datetime
 
 import enum
@@ -27,7 +39,51 @@ class Transactions(Base):
     description: Mapped[str] = mapped_column(String, nullable=True)
     created_at: Mapped[datetime] = mapped_column(server_default=func.now())
 
+    __table_args__ = (
+        Index(
+            "ix_transactions_user_id_created_at",
+            "user_id",
+            text("created_at DESC"),
+            text("id DESC"),
+        ),
+        Index(
+            "ix_transactions_user_id_created_at_covering",
+            "user_id",
+            "created_at",
+            postgresql_include=["amount", "transaction_type"],
+        ),
+        Index("ix_transactions_category_id", "category_id"),
+        # Фильтры списка по категории и типу с сортировкой по дате
+        Index(
+            "ix_transactions_user_id_category_id_created_at",
+            "user_id",
+            "category_id",
+            text("created_at DESC"),
+        ),
+        Index(
+            "ix_transactions_user_id_transaction_type_created_at",
+            "user_id",
+            "transaction_type",
+            text("created_at DESC"),
+        ),
+        # Поиск по подстроке в описании (ILIKE '%...%')
+        Index(
+            "ix_transactions_description_trgm",
+            "description",
+            postgresql_using="gin",
+            postgresql_ops={"description": "gin_trgm_ops"},
+        ),
+    )
+
     user: Mapped["Users"] = relationship("Users", back_populates="transactions")
     category: Mapped["Categories"] = relationship(
         "Categories", back_populates="transactions"
     )
+
+
+# gin_trgm_ops нужен pg_trgm: create_all на пустой базе ставит расширение сам
+event.listen(
+    Transactions.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"),
+)
@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Integer, DateTime, Float, Boolean
+from sqlalchemy import String, Integer, BigInteger, DateTime, Float, Boolean
 from datetime import datetime
 
 from app.models.transaction import Transactions
@@ -12,9 +12,20 @@ class Users(Base):
     username: Mapped[str] = mapped_column(String, nullable=False, unique=True)
     email: Mapped[str] = mapped_column(String, nullable=False, unique=True)
     hashed_password: Mapped[str] = mapped_column(String, nullable=False)
+    # id аккаунта Telegram, если он привязан (username при этом tg_<id>)
+    telegram_id: Mapped[int | None] = mapped_column(
+        BigInteger, nullable=True, unique=True, index=True
+    )
     balance: Mapped[float] = mapped_column(Float, default=0)
+    # Lifetime-итоги по транзакциям, обновляются вместе с balance
+    total_income: Mapped[float] = mapped_column(Float, default=0, server_default="0")
+    total_expense: Mapped[float] = mapped_column(Float, default=0, server_default="0")
+    income_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    expense_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now())
     is_admin: Mapped[bool] = mapped_column(Boolean, default=False)
+    # Растет при каждом изменении данных пользователя, из нее строится ETag
+    data_version: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0")
 
     categories: Mapped[list["Categories"]] = relationship(
         "Categories", back_populates="user"
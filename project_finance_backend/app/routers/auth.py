@@ -7,7 +7,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.dependencies import get_db, get_current_user
-from app.crud.user import verify_password
+from app.crud.user import verify_password_async
 from app.core.security import create_access_token
 from app.core.config import settings
 
@@ -30,7 +30,9 @@ async def verify_access_token(
     if not user:
         raise HTTPException(status_code=401, detail="Incorrect username or password")
     
-    password_valid = verify_password(form_data.password, user.hashed_password)
+    password_valid = await verify_password_async(
+        form_data.password, user.hashed_password
+    )
     
     if not password_valid:
         raise HTTPException(status_code=401, detail="Incorrect username or password")
@@ -1,38 +1,69 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
 from app.crud import category
 from app.schemas.categories import CategoryCreate, CategoryRead, CategoryUpdate
-from app.api.dependencies import get_db, get_current_user
+from app.api.dependencies import (
+    get_db,
+    get_read_db,
+    get_current_user,
+    get_current_identity,
+    check_not_modified,
+)
 from app.models import Users
+from app.crud.user import UserIdentity
+from app.core.pagination import set_next_cursor
+from app.core.serialization import encode_response
 
 router = APIRouter(prefix="/categories", tags=["categories"])
 
+read_category_adapter = TypeAdapter(CategoryRead)
+read_categories_adapter = TypeAdapter(list[CategoryRead])
 
-@router.get("/", response_model=list[CategoryRead])
+
+@router.get(
+    "/",
+    response_model=list[CategoryRead],
+    dependencies=[Depends(check_not_modified)],
+)
 async def read_categories(
-    current_user: Users = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    current_user: UserIdentity = Depends(get_current_identity),
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_read_db),
 ):
     read_category = await category.get_categories(
-        current_user, db, skip=skip, limit=limit
+        current_user, db, skip=skip, limit=limit, cursor=cursor
+    )
+    set_next_cursor(response, read_category, limit, lambda c: (c.id,))
+    return encode_response(
+        request,
+        response,
+        read_categories_adapter,
+        read_category,
+        from_attributes=True,
     )
-    return read_category
 
 
 @router.get("/{category_id}", response_model=CategoryRead)
 async def get_category(
+    request: Request,
+    response: Response,
     category_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: Users = Depends(get_current_user),
+    current_user: UserIdentity = Depends(get_current_identity),
 ):
     read_category = await category.get_categories_id(db, category_id, current_user)
     if not read_category:
         raise HTTPException(status_code=404, detail="Category not found")
-    return read_category
+    return encode_response(
+        request, response, read_category_adapter, read_category, from_attributes=True
+    )
 
 
 @router.post("/", response_model=CategoryRead)
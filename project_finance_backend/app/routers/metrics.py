@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends
+
+from app.api.dependencies import get_current_admin
+from app.db import async_engine, replica_engine, get_pool_stats
+from app.core.cache import caches
+from app.core.password_hashing import password_pool_stats
+from app.bot.services.speech_recognition import transcription_status
+from app.bot.services.transcription_queue import transcription_queue
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["metrics"],
+    dependencies=[Depends(get_current_admin)],
+)
+
+
+@router.get("/db-pool")
+async def db_pool_metrics():
+    """Статистика пула соединений с БД (для подбора pool_size/max_overflow)"""
+    return {
+        "primary": get_pool_stats(async_engine),
+        "replica": get_pool_stats(replica_engine) if replica_engine else None,
+    }
+
+
+@router.get("/caches")
+async def cache_metrics():
+    """Размер и попадания/промахи кэшей в памяти этого воркера"""
+    return {name: cache.stats() for name, cache in caches.items()}
+
+
+@router.get("/password-hashing")
+async def password_hashing_metrics():
+    """Очередь и время ожидания пула bcrypt"""
+    return password_pool_stats.as_dict()
+
+
+@router.get("/transcription")
+async def transcription_metrics():
+    """Готовность распознавания голосовых и очередь (глубина, ожидание)"""
+    return {**transcription_status, "queue": transcription_queue.stats()}
@@ -1,28 +1,95 @@
 from datetime import date
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.crud.stats import get_stats_for_period
+from app.crud.stats import get_stats_for_period, get_stats_series, get_stats_summary
 
-from app.api.dependencies import get_db, get_current_user
-from app.models import Users
-from app.schemas.stats import StatsItem
+from app.api.dependencies import (
+    get_read_db,
+    get_current_identity,
+    check_not_modified,
+)
+from app.crud.user import UserIdentity
+from app.schemas.stats import StatsItem, StatsSeries, StatsSummary
+from app.core.serialization import encode_response
 
 router = APIRouter(prefix="/stats", tags=["stats"])
 
+stats_adapter = TypeAdapter(list[StatsItem])
+stats_series_adapter = TypeAdapter(StatsSeries)
+stats_summary_adapter = TypeAdapter(StatsSummary)
 
-@router.get("/", response_model=list[StatsItem])
+GROUP_BY_VALUES = ["day", "week", "month", "quarter", "year"]
+
+
+@router.get(
+    "/",
+    response_model=list[StatsItem],
+    dependencies=[Depends(check_not_modified)],
+)
 async def get_stats(
+    request: Request,
+    response: Response,
     date_from: date = Query(..., description="Начало периода (YYYY-MM-DD)"),
     date_to: date = Query(..., description="Конец периода (YYYY-MM-DD)"),
-    group_by: str = Query("month", enum=["day", "month", "year"]),
-    db: AsyncSession = Depends(get_db),
-    current_user: Users = Depends(get_current_user),
+    group_by: str = Query("month", enum=GROUP_BY_VALUES),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserIdentity = Depends(get_current_identity),
 ):
-    return await get_stats_for_period(
+    stats = await get_stats_for_period(
         db=db,
         user_id=current_user.id,
         date_from=date_from,
         date_to=date_to,
         group_by=group_by,
     )
+    return encode_response(request, response, stats_adapter, stats)
+
+
+@router.get(
+    "/series",
+    response_model=StatsSeries,
+    dependencies=[Depends(check_not_modified)],
+)
+async def get_stats_series_endpoint(
+    request: Request,
+    response: Response,
+    date_from: date = Query(..., description="Начало периода (YYYY-MM-DD)"),
+    date_to: date = Query(..., description="Конец периода (YYYY-MM-DD)"),
+    group_by: str = Query("month", enum=GROUP_BY_VALUES),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserIdentity = Depends(get_current_identity),
+):
+    """Ряд для графиков: все периоды подряд, пустые - с нулями"""
+    series = await get_stats_series(
+        db=db,
+        user_id=current_user.id,
+        date_from=date_from,
+        date_to=date_to,
+        group_by=group_by,
+    )
+    return encode_response(request, response, stats_series_adapter, series)
+
+
+@router.get(
+    "/summary",
+    response_model=StatsSummary,
+    dependencies=[Depends(check_not_modified)],
+)
+async def get_stats_summary_endpoint(
+    request: Request,
+    response: Response,
+    date_from: date | None = Query(None, description="Начало периода (YYYY-MM-DD)"),
+    date_to: date | None = Query(None, description="Конец периода включительно"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserIdentity = Depends(get_current_identity),
+):
+    """Доходы, расходы, количество и баланс за период (без дат - за все время)"""
+    summary = await get_stats_summary(
+        db=db,
+        user_id=current_user.id,
+        date_from=date_from,
+        date_to=date_to,
+    )
+    return encode_response(request, response, stats_summary_adapter, summary)
@@ -1,14 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel, EmailStr
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, or_
 
 from app.api.dependencies import get_db, get_current_user
 from app.core.telegram_verification import verify_telegram_webapp_data
 from app.core.config import settings
 from app.core.security import create_access_token
 from app.models.user import Users
-from app.crud.user import create_user, get_users_id, update_user, get_hash_password
+from app.crud.user import (
+    create_user,
+    get_users_id,
+    update_user,
+    get_user_by_telegram_id,
+    identity_cache,
+)
+from app.core.cache_invalidation import invalidate
+from app.crud.data_version import NEXT_DATA_VERSION, data_version_changed
 from app.schemas.users import CreateUser, UpdateUser
 from datetime import timedelta
 
@@ -101,12 +109,9 @@ async def telegram_auth(
     full_name = f"{first_name} {last_name}".strip()
     telegram_username = user_data.get("username", "")
     
-    # Ищем пользователя по username (формат tg_123456789)
+    # Ищем пользователя по привязанному telegram_id
     username = f"tg_{telegram_id}"
-    result = await db.execute(
-        select(Users).where(Users.username == username)
-    )
-    user = result.scalar_one_or_none()
+    user = await get_user_by_telegram_id(db, int(telegram_id))
     is_new_user = False
     needs_link = False
     
@@ -168,7 +173,7 @@ async def link_telegram_account(
     import logging
     import json
     from urllib.parse import unquote
-    from app.crud.user import verify_password
+    from app.crud.user import verify_password_async
     
     logger = logging.getLogger(__name__)
     
@@ -219,11 +224,17 @@ async def link_telegram_account(
         # Используем Telegram username и устанавливаем email и пароль
         telegram_username = f"tg_{telegram_id}"
         
-        # Проверяем, не занят ли username
-        existing_username_result = await db.execute(
-            select(Users).where(Users.username == telegram_username)
+        # Проверяем, не привязан ли уже этот Telegram и не занят ли username
+        # (у старых аккаунтов tg_<id> telegram_id может быть не заполнен)
+        existing_telegram_result = await db.execute(
+            select(Users.id).where(
+                or_(
+                    Users.telegram_id == int(telegram_id),
+                    Users.username == telegram_username,
+                )
+            )
         )
-        if existing_username_result.scalar_one_or_none():
+        if existing_telegram_result.first():
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Telegram account already linked"
@@ -240,7 +251,9 @@ async def link_telegram_account(
         existing_user = await create_user(db, user_data_create)
     else:
         # Пользователь существует - проверяем пароль
-        if not verify_password(request.password, existing_user.hashed_password):
+        if not await verify_password_async(
+            request.password, existing_user.hashed_password
+        ):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid password"
@@ -248,22 +261,23 @@ async def link_telegram_account(
     
     # Проверяем, не связан ли уже этот Telegram с другим аккаунтом
     telegram_username = f"tg_{telegram_id}"
-    telegram_user_result = await db.execute(
-        select(Users).where(Users.username == telegram_username)
-    )
-    telegram_user = telegram_user_result.scalar_one_or_none()
+    telegram_user = await get_user_by_telegram_id(db, int(telegram_id))
     
     if telegram_user and telegram_user.id != existing_user.id:
         # Если Telegram уже связан с другим аккаунтом, удаляем временного пользователя
         await db.delete(telegram_user)
         await db.commit()
+        await invalidate(db, identity_cache, telegram_user.id)
     
     # Обновляем username существующего пользователя на Telegram username
     # Это свяжет аккаунты - теперь пользователь может входить через Telegram
     existing_user.username = telegram_username
+    existing_user.telegram_id = int(telegram_id)
+    existing_user.data_version = NEXT_DATA_VERSION
     db.add(existing_user)
     await db.commit()
     await db.refresh(existing_user)
+    await data_version_changed(db, existing_user.id)
     
     # Создаем JWT токен
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
@@ -1,49 +1,198 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+from datetime import date, datetime
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+)
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy import select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.crud import transaction
+from app.crud.export import export_transactions_csv, export_transactions_ndjson
+from app.crud.bulk_import import parse_import_file, import_transactions
 from app.schemas.transactions import (
     TransactionCreate,
     ReadTransaction,
     UpdateTransaction,
+    ImportResult,
+    TransactionBatch,
+    TransactionBatchResult,
+    TransactionDay,
+)
+from app.api.dependencies import (
+    get_db,
+    get_read_db,
+    get_current_user,
+    get_current_identity,
+    check_not_modified,
 )
-from app.api.dependencies import get_db, get_current_user
 from app.models import Users
+from app.crud.user import UserIdentity
 from app.models import Transactions
 from app.models.transaction import TransactionType
+from app.core.pagination import decode_cursor, set_next_cursor
+from app.core.serialization import encode_response
 
 router = APIRouter(
     prefix="/transactions",
     tags=["transactions"],
-    dependencies=[Depends(get_current_user)],
+    dependencies=[Depends(get_current_identity)],
 )
 
+read_transaction_adapter = TypeAdapter(ReadTransaction)
+read_transactions_adapter = TypeAdapter(list[ReadTransaction])
+transaction_days_adapter = TypeAdapter(list[TransactionDay])
 
-@router.get("/", response_model=list[ReadTransaction])
+
+@router.get(
+    "/",
+    response_model=list[ReadTransaction],
+    dependencies=[Depends(check_not_modified)],
+)
 async def read_transactions(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db),
-    current_user: Users = Depends(get_current_user),
+    cursor: str | None = None,
+    category_id: int | None = None,
+    transaction_type: TransactionType | None = None,
+    amount_min: float | None = Query(None, ge=0),
+    amount_max: float | None = Query(None, ge=0),
+    date_from: date | None = Query(None, description="Начало периода (YYYY-MM-DD)"),
+    date_to: date | None = Query(None, description="Конец периода включительно"),
+    q: str | None = Query(None, max_length=100, description="Поиск по описанию"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserIdentity = Depends(get_current_identity),
 ):
-    result = await db.execute(
-        select(Transactions)
-        .where(Transactions.user_id == current_user.id)
-        .options(selectinload(Transactions.category))
-        .offset(skip)
+    # cursor (из заголовка X-Next-Cursor прошлой страницы) - keyset-пагинация
+    # по (created_at, id), не зависит от глубины; skip оставлен для совместимости.
+    # Фильтры комбинируются с курсором: передавайте те же, что и для первой страницы
+    query = (
+        transaction.transaction_rows_query(current_user.id)
+        .order_by(Transactions.created_at.desc(), Transactions.id.desc())
         .limit(limit)
-        .order_by(Transactions.created_at.desc())
     )
-    return result.scalars().all()
+    query = transaction.filter_transactions(
+        query,
+        category_id=category_id,
+        transaction_type=transaction_type,
+        amount_min=amount_min,
+        amount_max=amount_max,
+        date_from=date_from,
+        date_to=date_to,
+        search=q,
+    )
+    if cursor:
+        created_at, transaction_id = decode_cursor(cursor, datetime, int)
+        query = query.where(
+            tuple_(Transactions.created_at, Transactions.id)
+            < tuple_(created_at, transaction_id)
+        )
+    else:
+        query = query.offset(skip)
+
+    result = await db.execute(query)
+    transactions = [transaction.transaction_row_to_dict(row) for row in result]
+    set_next_cursor(
+        response, transactions, limit, lambda t: (t["created_at"], t["id"])
+    )
+    return encode_response(request, response, read_transactions_adapter, transactions)
+
+
+@router.get(
+    "/by-day",
+    response_model=list[TransactionDay],
+    dependencies=[Depends(check_not_modified)],
+)
+async def read_transactions_by_day(
+    request: Request,
+    response: Response,
+    days: int = Query(7, ge=1, le=92, description="Сколько дней с транзакциями"),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserIdentity = Depends(get_current_identity),
+):
+    """
+    Лента транзакций, сгруппированная по дням (новые сверху), с итогами дня
+
+    Страница - days дней, в которые были транзакции; курсор следующей
+    страницы в X-Next-Cursor
+    """
+    before = decode_cursor(cursor, date)[0] if cursor else None
+    day_groups = await transaction.get_transactions_by_day(
+        db, current_user.id, days=days, before=before
+    )
+    set_next_cursor(response, day_groups, days, lambda d: (d["day"],))
+    return encode_response(request, response, transaction_days_adapter, day_groups)
+
+
+@router.get("/export")
+async def export_transactions(
+    format: str = Query("csv", enum=["csv", "ndjson"]),
+    date_from: date | None = Query(None, description="Начало периода (YYYY-MM-DD)"),
+    date_to: date | None = Query(None, description="Конец периода включительно"),
+    category_id: int | None = None,
+    current_user: UserIdentity = Depends(get_current_identity),
+):
+    """Выгрузка транзакций потоком прямо из Postgres (COPY ... TO STDOUT)"""
+    filters = dict(date_from=date_from, date_to=date_to, category_id=category_id)
+    if format == "ndjson":
+        body = export_transactions_ndjson(current_user.id, **filters)
+        media_type = "application/x-ndjson"
+    else:
+        body = export_transactions_csv(current_user.id, **filters)
+        media_type = "text/csv"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="transactions.{format}"'
+        },
+    )
+
+
+@router.post("/import", response_model=ImportResult)
+async def import_transactions_file(
+    file: UploadFile,
+    format: str = Query("csv", enum=["csv", "json"]),
+    current_user: Users = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Массовый импорт из CSV (заголовок: category_id,amount,transaction_type,
+    description,created_at) или JSON-массива с теми же полями
+    """
+    rows = parse_import_file(await file.read(), format)
+    return await import_transactions(current_user, db, rows)
+
+
+@router.post("/batch", response_model=TransactionBatchResult)
+async def batch_transactions(
+    batch: TransactionBatch,
+    current_user: Users = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Пачка create/update/delete одним запросом и одной транзакцией БД"""
+    return await transaction.apply_transaction_batch(current_user, db, batch)
 
 
 @router.get("/{transaction_id}", response_model=ReadTransaction)
 async def read_transaction(
+    request: Request,
+    response: Response,
     transaction_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: Users = Depends(get_current_user),
+    current_user: UserIdentity = Depends(get_current_identity),
 ):
     result = await db.execute(
         select(Transactions)
@@ -58,7 +207,13 @@ async def read_transaction(
     if transaction_obj.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Forbidden")
 
-    return transaction_obj
+    return encode_response(
+        request,
+        response,
+        read_transaction_adapter,
+        transaction_obj,
+        from_attributes=True,
+    )
 
 
 @router.post("/", response_model=ReadTransaction)
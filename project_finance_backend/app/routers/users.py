@@ -1,23 +1,32 @@
-from fastapi import Depends, APIRouter, HTTPException
+from fastapi import Depends, APIRouter, HTTPException, Request, Response
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud import user as user_crud
 from app.schemas.users import ReadUser, UpdateUser, CreateUser
-from app.api.dependencies import get_db, get_current_admin
-from app.models import Users
+from app.api.dependencies import get_db, get_read_db, get_current_admin
+from app.crud.user import UserIdentity
+from app.core.pagination import set_next_cursor
+from app.core.serialization import encode_response
 
 router = APIRouter(prefix="/users", tags=["users"])
 
+read_users_adapter = TypeAdapter(list[ReadUser])
+
 
 @router.get("/", response_model=list[ReadUser])
 async def get_users(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db),
-    current_admin: Users = Depends(get_current_admin),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_admin: UserIdentity = Depends(get_current_admin),
 ):
-    users = await user_crud.get_users(db, skip=skip, limit=limit)
-    return users
+    users = await user_crud.get_users(db, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor(response, users, limit, lambda u: (u["id"],))
+    return encode_response(request, response, read_users_adapter, users)
 
 
 @router.get("/{user_id}", response_model=ReadUser)
@@ -39,7 +48,7 @@ async def update_user(
     user_id: int,
     user_data: UpdateUser,
     db: AsyncSession = Depends(get_db),
-    current_admin: Users = Depends(get_current_admin),
+    current_admin: UserIdentity = Depends(get_current_admin),
 ):
     updated_user = await user_crud.update_user(db, user_id, user_data)
     if not updated_user:
@@ -51,7 +60,7 @@ async def update_user(
 async def delete_user(
     user_id: int,
     db: AsyncSession = Depends(get_db),
-    current_admin: Users = Depends(get_current_admin),
+    current_admin: UserIdentity = Depends(get_current_admin),
 ):
     deleted_user = await user_crud.delete_user(db, user_id)
     if not deleted_user:
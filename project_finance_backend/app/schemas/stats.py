@@ -1,3 +1,5 @@
+from datetime import date
+
 from pydantic import BaseModel
 
 
@@ -5,3 +7,21 @@ class StatsItem(BaseModel):
     period: str
     income: float
     expense: float
+
+
+class StatsSeries(BaseModel):
+    # Параллельные массивы: income[i] и expense[i] относятся к periods[i]
+    periods: list[str]
+    income: list[float]
+    expense: list[float]
+
+
+class StatsSummary(BaseModel):
+    total_income: float
+    total_expense: float
+    balance: float  # доходы минус расходы за период
+    transactions_count: int
+    income_count: int
+    expense_count: int
+    period_start: date | None = None
+    period_end: date | None = None
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, ConfigDict, Field
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import Annotated, Literal, Optional, Union
 
 from app.models.transaction import TransactionType
 
@@ -38,8 +38,70 @@ class ReadTransaction(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class TransactionDay(BaseModel):
+    day: date
+    income: float
+    expense: float
+    transactions: list[ReadTransaction]
+
+
 class UpdateTransaction(BaseModel):
     category_id: int | None = None
     amount: float | None = None
     transaction_type: str | None = None
     description: str | None = None
+
+
+class TransactionImportRow(TransactionBase):
+    created_at: datetime | None = None
+
+
+class ImportRowError(BaseModel):
+    row: int
+    error: str
+
+
+class ImportResult(BaseModel):
+    imported: int
+    errors: list[ImportRowError]
+    balance: float
+
+
+class BatchCreateOperation(BaseModel):
+    op: Literal["create"]
+    data: TransactionCreate
+
+
+class BatchUpdateOperation(BaseModel):
+    op: Literal["update"]
+    id: int
+    data: UpdateTransaction
+
+
+class BatchDeleteOperation(BaseModel):
+    op: Literal["delete"]
+    id: int
+
+
+BatchOperation = Annotated[
+    Union[BatchCreateOperation, BatchUpdateOperation, BatchDeleteOperation],
+    Field(discriminator="op"),
+]
+
+
+class TransactionBatch(BaseModel):
+    operations: list[BatchOperation] = Field(..., min_length=1, max_length=1000)
+
+
+class BatchItemResult(BaseModel):
+    index: int
+    op: str
+    ok: bool
+    id: int | None = None
+    error: str | None = None
+    transaction: ReadTransaction | None = None
+
+
+class TransactionBatchResult(BaseModel):
+    results: list[BatchItemResult]
+    balance: float
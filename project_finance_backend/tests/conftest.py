@@ -0,0 +1,102 @@
+"""
+Тесты с БД идут против Postgres из TEST_DATABASE_URL
+(postgresql+asyncpg://...). Схема пересоздается по моделям при каждом запуске -
+указывайте отдельную тестовую базу. Без TEST_DATABASE_URL тесты с БД пропускаются
+"""
+
+import asyncio
+import os
+from uuid import uuid4
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "")
+
+# Settings обязательны при импорте app.*
+for key, value in {
+    "APP_NAME": "project_finance_test",
+    "DATABASE_URL": TEST_DATABASE_URL or "postgresql+asyncpg://localhost/test",
+    "JWT_SECRET": "test",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "TELEGRAM_BOT_TOKEN": "test",
+}.items():
+    os.environ.setdefault(key, value)
+
+from app.core.config import settings  # noqa: E402
+
+# .env загружается с override=True - подменяем адрес до создания engine
+if TEST_DATABASE_URL:
+    settings.database_url = TEST_DATABASE_URL
+settings.database_replica_url = ""
+
+from app.db import AsyncSessionLocal, async_engine  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Base, Categories, Users  # noqa: E402
+
+
+async def _create_schema():
+    async with async_engine.begin() as connection:
+        # Для триграммного индекса ix_transactions_description_trgm
+        await connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+    await async_engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def schema():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    asyncio.run(_create_schema())
+
+
+@pytest.fixture
+async def db(schema):
+    async with AsyncSessionLocal() as session:
+        yield session
+    # У каждого теста свой event loop: соединения пула в следующий не переносим
+    await async_engine.dispose()
+
+
+@pytest.fixture
+async def user(db) -> Users:
+    name = f"test_{uuid4().hex[:12]}"
+    new_user = Users(
+        username=name,
+        email=f"{name}@example.com",
+        hashed_password="x",
+        balance=0.0,
+    )
+    db.add(new_user)
+    await db.commit()
+    return new_user
+
+
+@pytest.fixture
+async def categories(db, user) -> list[Categories]:
+    items = [
+        Categories(name=name, type=category_type, user_id=user.id)
+        for name, category_type in (
+            ("Зарплата", "income"),
+            ("Продукты", "expense"),
+            ("Транспорт", "expense"),
+        )
+    ]
+    db.add_all(items)
+    await db.commit()
+    return items
+
+
+@pytest.fixture
+async def client(user):
+    """HTTP-клиент к приложению (без lifespan: бот и Whisper не запускаются)"""
+    transport = ASGITransport(app=app)
+    headers = {"Authorization": f"Bearer {create_access_token(user.id)}"}
+    async with AsyncClient(
+        transport=transport, base_url="http://test", headers=headers
+    ) as http_client:
+        yield http_client
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app.crud.bulk_import import import_transactions
+from app.crud.rollup import rebuild_rollups
+from app.crud.user import recompute_user_totals
+from app.models import DailyRollups, Users
+
+TOTAL_COLUMNS = (
+    Users.balance,
+    Users.total_income,
+    Users.total_expense,
+    Users.income_count,
+    Users.expense_count,
+)
+ROLLUP_COLUMNS = (
+    DailyRollups.day,
+    DailyRollups.category_id,
+    DailyRollups.income,
+    DailyRollups.expense,
+    DailyRollups.income_count,
+    DailyRollups.expense_count,
+)
+
+
+async def _rollups(db, user_id: int) -> list[tuple]:
+    result = await db.execute(
+        select(*ROLLUP_COLUMNS)
+        .where(DailyRollups.user_id == user_id)
+        .order_by(DailyRollups.day, DailyRollups.category_id)
+    )
+    return [tuple(row) for row in result]
+
+
+async def _totals(db, user_id: int) -> tuple:
+    result = await db.execute(select(*TOTAL_COLUMNS).where(Users.id == user_id))
+    return tuple(result.one())
+
+
+async def test_import_touching_many_days_and_categories(db, user, categories):
+    # 3 категории x 2000 дней = 6000 пар (день, категория): больше, чем
+    # помещается параметров в один INSERT ... VALUES
+    start = datetime(2020, 1, 1, 12)
+    rows = [
+        {
+            "category_id": category.id,
+            "amount": 1 + day % 50,
+            "transaction_type": "income" if category.type == "income" else "expense",
+            "created_at": (start + timedelta(days=day)).isoformat(),
+        }
+        for day in range(2000)
+        for category in categories
+    ]
+
+    result = await import_transactions(user, db, rows)
+
+    assert result["imported"] == len(rows)
+    assert result["errors"] == []
+    imported = await _rollups(db, user.id)
+    assert len(imported) == len(rows)
+
+    # Итоги после импорта совпадают с пересчетом с нуля
+    await rebuild_rollups(db, user.id)
+    assert await _rollups(db, user.id) == imported
+
+    totals = await _totals(db, user.id)
+    await recompute_user_totals(db, user.id)
+    assert await _totals(db, user.id) == totals
+    assert totals[0] == totals[1] - totals[2]
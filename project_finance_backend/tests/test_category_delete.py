@@ -0,0 +1,75 @@
+from sqlalchemy import select
+
+from app.crud.rollup import rebuild_rollups
+from app.crud.transaction import create_transaction
+from app.crud.user import recompute_user_totals
+from app.models import DailyRollups, Transactions, Users
+from app.models.transaction import TransactionType
+from app.schemas.transactions import TransactionCreate
+
+TOTAL_COLUMNS = (
+    Users.total_income,
+    Users.total_expense,
+    Users.income_count,
+    Users.expense_count,
+)
+
+
+async def _totals(db, user_id: int) -> tuple:
+    result = await db.execute(select(*TOTAL_COLUMNS).where(Users.id == user_id))
+    return tuple(result.one())
+
+
+async def _rollups(db, user_id: int) -> list[tuple]:
+    result = await db.execute(
+        select(
+            DailyRollups.day,
+            DailyRollups.category_id,
+            DailyRollups.income,
+            DailyRollups.expense,
+            DailyRollups.income_count,
+            DailyRollups.expense_count,
+        )
+        .where(DailyRollups.user_id == user_id)
+        .order_by(DailyRollups.day, DailyRollups.category_id)
+    )
+    return [tuple(row) for row in result]
+
+
+async def test_delete_category_subtracts_its_transactions(client, db, user, categories):
+    income_category, food, transport = categories
+    for category, amount, transaction_type in (
+        (income_category, 1000, TransactionType.INCOME),
+        (food, 40, TransactionType.EXPENSE),
+        (food, 60, TransactionType.EXPENSE),
+        (transport, 25, TransactionType.EXPENSE),
+    ):
+        await create_transaction(
+            user,
+            db,
+            TransactionCreate(
+                category_id=category.id,
+                amount=amount,
+                transaction_type=transaction_type,
+            ),
+        )
+
+    response = await client.delete(f"/categories/{food.id}")
+    assert response.status_code == 200
+
+    assert (
+        await db.scalar(
+            select(Transactions.id).where(Transactions.category_id == food.id)
+        )
+        is None
+    )
+    totals = await _totals(db, user.id)
+    assert totals == (1000, 25, 1, 1)
+    rollups = await _rollups(db, user.id)
+    assert {row[1] for row in rollups} == {income_category.id, transport.id}
+
+    # Итоги и daily_rollups совпадают с пересчетом с нуля
+    await recompute_user_totals(db, user.id)
+    assert await _totals(db, user.id) == totals
+    await rebuild_rollups(db, user.id)
+    assert await _rollups(db, user.id) == rollups
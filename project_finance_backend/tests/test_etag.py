@@ -0,0 +1,27 @@
+from sqlalchemy import update
+
+from app.models import Users
+
+
+async def test_profile_etag_follows_user_row(client, db, user):
+    version = user.data_version
+    for path in ("/me", "/profile"):
+        response = await client.get(path)
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+        assert etag == f'"{user.id}-{version}"'
+
+        response = await client.get(path, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+    await db.execute(
+        update(Users)
+        .where(Users.id == user.id)
+        .values(data_version=Users.data_version + 1, total_income=10)
+    )
+    await db.commit()
+
+    response = await client.get("/profile", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] == f'"{user.id}-{version + 1}"'
+    assert response.json()["income"] == 10
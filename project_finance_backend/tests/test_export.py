@@ -0,0 +1,71 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from app.models import Transactions
+from app.models.transaction import TransactionType
+
+
+async def _add_transactions(db, user, categories):
+    income_category, food, _ = categories
+    db.add_all(
+        [
+            Transactions(
+                amount=1500,
+                category_id=income_category.id,
+                transaction_type=TransactionType.INCOME,
+                user_id=user.id,
+                created_at=datetime(2026, 2, 1, 10),
+            ),
+            Transactions(
+                amount=12.5,
+                category_id=food.id,
+                transaction_type=TransactionType.EXPENSE,
+                description='Кофе, "большой"\nи булка',
+                user_id=user.id,
+                created_at=datetime(2026, 2, 2, 9),
+            ),
+        ]
+    )
+    await db.commit()
+
+
+async def test_export_csv(client, db, user, categories):
+    await _add_transactions(db, user, categories)
+
+    response = await client.get("/transactions/export", params={"format": "csv"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == [
+        "id",
+        "created_at",
+        "transaction_type",
+        "amount",
+        "category_id",
+        "category",
+        "description",
+    ]
+    assert [row[2] for row in rows[1:]] == ["income", "expense"]
+    assert rows[2][5:] == ["Продукты", 'Кофе, "большой"\nи булка']
+
+
+async def test_export_ndjson(client, db, user, categories):
+    await _add_transactions(db, user, categories)
+
+    response = await client.get(
+        "/transactions/export",
+        params={"format": "ndjson", "date_from": "2026-02-02"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = response.text.splitlines()
+    assert len(lines) == 1
+    item = json.loads(lines[0])
+    assert item["transaction_type"] == "expense"
+    assert item["amount"] == 12.5
+    assert item["category"] == "Продукты"
+    assert item["description"] == 'Кофе, "большой"\nи булка'
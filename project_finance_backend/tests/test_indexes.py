@@ -0,0 +1,126 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select, text
+
+from app.crud.transaction import filter_transactions, transaction_rows_query
+from app.db import async_engine
+from app.models import Transactions, Users
+from app.models.transaction import TransactionType
+
+ROWS_PER_USER = 5000
+
+
+@pytest.fixture
+async def seeded(db, user, categories):
+    # Строки другого пользователя, чтобы выборка по user_id была избирательной
+    other = Users(
+        username=f"{user.username}_other",
+        email=f"other_{user.email}",
+        hashed_password="x",
+    )
+    db.add(other)
+    await db.commit()
+    for user_id in (user.id, other.id):
+        await db.execute(
+            text(
+                """
+                INSERT INTO transactions
+                    (amount, category_id, transaction_type, user_id, created_at)
+                SELECT
+                    i, :category_id,
+                    (CASE WHEN i % 2 = 0 THEN 'INCOME' ELSE 'EXPENSE' END)::transactiontype,
+                    :user_id, LOCALTIMESTAMP - i * interval '1 hour'
+                FROM generate_series(1, :rows) AS i
+                """
+            ),
+            {
+                "category_id": categories[0].id,
+                "user_id": user_id,
+                "rows": ROWS_PER_USER,
+            },
+        )
+    await db.commit()
+    # VACUUM - ради карты видимости, без нее index-only scan не выбирается
+    async with async_engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        await connection.execute(text("VACUUM ANALYZE transactions"))
+    return user
+
+
+async def _plan(db, query) -> str:
+    connection = await db.connection()
+    # Диалект подключения: знает standard_conforming_strings сервера
+    sql = query.compile(
+        dialect=connection.dialect, compile_kwargs={"literal_binds": True}
+    )
+    # Таблица в тесте маленькая: запрещаем seq scan, чтобы проверять выбор индекса
+    await db.execute(text("SET LOCAL enable_seqscan = off"))
+    result = await connection.exec_driver_sql(f"EXPLAIN {sql}")
+    return "\n".join(row[0] for row in result)
+
+
+async def test_transaction_list_uses_user_created_at_index(db, seeded):
+    query = (
+        transaction_rows_query(seeded.id)
+        .order_by(Transactions.created_at.desc(), Transactions.id.desc())
+        .limit(50)
+    )
+    plan = await _plan(db, query)
+    assert "using ix_transactions_user_id_created_at on" in plan.lower()
+    assert "Sort" not in plan
+
+
+async def test_period_totals_use_covering_index(db, seeded):
+    is_income = Transactions.transaction_type == TransactionType.INCOME
+    query = select(
+        func.sum(Transactions.amount).filter(is_income),
+        func.count().filter(is_income),
+    ).where(
+        Transactions.user_id == seeded.id,
+        Transactions.created_at >= datetime(2000, 1, 1),
+    )
+    plan = await _plan(db, query)
+    assert "Index Only Scan using ix_transactions_user_id_created_at_covering" in plan
+
+
+async def test_category_cascade_uses_category_index(db, seeded, categories):
+    query = select(Transactions.id).where(Transactions.category_id == categories[1].id)
+    plan = await _plan(db, query)
+    assert "ix_transactions_category_id" in plan
+
+
+def _filtered_list(user_id: int, **filters):
+    return (
+        filter_transactions(transaction_rows_query(user_id), **filters)
+        .order_by(Transactions.created_at.desc(), Transactions.id.desc())
+        .limit(50)
+    )
+
+
+async def test_category_filter_uses_category_index(db, seeded, categories):
+    plan = await _plan(db, _filtered_list(seeded.id, category_id=categories[0].id))
+    assert "ix_transactions_user_id_category_id_created_at" in plan
+
+
+async def test_type_filter_uses_type_index(db, seeded):
+    # Индекс по типу выигрывает, когда тип редкий: оставляем 1% доходов
+    await db.execute(
+        text(
+            """
+            UPDATE transactions SET transaction_type = 'EXPENSE'
+            WHERE user_id = :user_id AND amount::int % 100 <> 0
+            """
+        ),
+        {"user_id": seeded.id},
+    )
+    await db.execute(text("ANALYZE transactions"))
+    plan = await _plan(
+        db, _filtered_list(seeded.id, transaction_type=TransactionType.INCOME)
+    )
+    assert "ix_transactions_user_id_transaction_type_created_at" in plan
+
+
+async def test_search_uses_trigram_index(db, seeded):
+    plan = await _plan(db, _filtered_list(seeded.id, search="кофе"))
+    assert "ix_transactions_description_trgm" in plan
@@ -0,0 +1,80 @@
+"""
+Всплеск логинов: пропускная способность /token и задержка остальных запросов
+
+Сравнивает bcrypt в пуле потоков (как в приложении) и bcrypt прямо в event loop
+(как было до пула). Запуск: pytest -m benchmark -s tests/test_login_benchmark.py
+"""
+
+import asyncio
+import statistics
+import time
+
+import pytest
+
+import app.crud.user as user_crud
+from app.crud.user import get_hash_password
+
+pytestmark = pytest.mark.benchmark
+
+LOGINS = 20
+PROBE_INTERVAL = 0.005
+
+
+async def _inline(func, *args):
+    # Поведение до пула: bcrypt блокирует event loop
+    return func(*args)
+
+
+async def _burst(client, email: str) -> tuple[float, list[float], list[int]]:
+    """Одновременные логины и параллельно GET /me; (логинов/с, задержки /me, статусы)"""
+    done = asyncio.Event()
+    latencies: list[float] = []
+
+    async def probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            response = await client.get("/me")
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200
+            await asyncio.sleep(PROBE_INTERVAL)
+
+    async def login():
+        response = await client.post(
+            "/token", data={"username": email, "password": "secret"}
+        )
+        return response.status_code
+
+    prober = asyncio.create_task(probe())
+    start = time.perf_counter()
+    statuses = await asyncio.gather(*(login() for _ in range(LOGINS)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await prober
+    return LOGINS / elapsed, latencies, statuses
+
+
+def _p99(latencies: list[float]) -> float:
+    return statistics.quantiles(latencies, n=100)[98] if len(latencies) > 1 else 0.0
+
+
+async def test_login_burst(client, db, user, monkeypatch):
+    user.hashed_password = get_hash_password("secret")
+    await db.commit()
+    # Прогрев: соединения пула и первый запрос приложения
+    await client.get("/me")
+
+    results = {}
+    for mode in ("thread pool", "event loop"):
+        if mode == "event loop":
+            monkeypatch.setattr(user_crud, "run_in_password_pool", _inline)
+        throughput, latencies, statuses = await _burst(client, user.email)
+        assert statuses == [200] * LOGINS
+        results[mode] = (throughput, statistics.median(latencies), _p99(latencies))
+
+    print(f"\n{LOGINS} одновременных логинов, параллельно GET /me")
+    print(f"{'bcrypt':<12} {'логинов/с':>10} {'/me p50, мс':>12} {'/me p99, мс':>12}")
+    for mode, (throughput, p50, p99) in results.items():
+        print(f"{mode:<12} {throughput:>10.1f} {p50 * 1000:>12.1f} {p99 * 1000:>12.1f}")
+
+    # В пуле потоков остальные запросы не ждут, пока посчитаются хэши
+    assert results["thread pool"][2] < results["event loop"][2]
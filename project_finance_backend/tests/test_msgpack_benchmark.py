@@ -0,0 +1,96 @@
+"""
+MessagePack против JSON на странице транзакций: размер тела и время
+кодирования на сервере и разбора на клиенте
+
+Запуск: pytest -m benchmark -s tests/test_msgpack_benchmark.py
+"""
+
+import gzip
+import json
+import time
+from datetime import datetime, timedelta
+
+import msgpack
+import pytest
+from fastapi import Response
+from starlette.requests import Request
+
+from app.core.serialization import MSGPACK_MEDIA_TYPE, encode_response
+from app.models.transaction import TransactionType
+from app.routers.transactions import read_transactions_adapter
+
+pytestmark = pytest.mark.benchmark
+
+SIZES = (100, 1_000, 10_000)
+REPEATS = 5
+
+
+def _items(size: int) -> list[dict]:
+    start = datetime(2026, 1, 1, 9)
+    return [
+        {
+            "id": i,
+            "amount": 10.0 + i % 500,
+            "category_id": i % 8,
+            "transaction_type": (
+                TransactionType.INCOME if i % 5 == 0 else TransactionType.EXPENSE
+            ),
+            "description": f"Покупка {i}" if i % 3 else None,
+            "created_at": start + timedelta(minutes=i),
+            "category": {
+                "id": i % 8,
+                "name": f"Категория {i % 8}",
+                "type": "expense",
+                "color": "#3b82f6",
+                "icon": "cart",
+            },
+        }
+        for i in range(size)
+    ]
+
+
+def _request(accept: str) -> Request:
+    return Request(
+        {"type": "http", "method": "GET", "headers": [(b"accept", accept.encode())]}
+    )
+
+
+def _best_time(func) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def test_msgpack_against_json():
+    formats = {
+        "json": ("application/json", json.loads),
+        "msgpack": (MSGPACK_MEDIA_TYPE, msgpack.unpackb),
+    }
+    print(
+        f"\n{'строк':>7} {'формат':>8} {'байт':>10} {'gzip, байт':>11}"
+        f" {'кодирование, мс':>16} {'разбор, мс':>11}"
+    )
+    for size in SIZES:
+        items = _items(size)
+        bodies = {}
+        for name, (accept, decode) in formats.items():
+            request = _request(accept)
+
+            def encode():
+                return encode_response(
+                    request, Response(), read_transactions_adapter, items
+                ).body
+
+            body = bodies[name] = encode()
+            encode_time = _best_time(encode)
+            decode_time = _best_time(lambda: decode(body))
+            print(
+                f"{size:>7} {name:>8} {len(body):>10} {len(gzip.compress(body)):>11}"
+                f" {encode_time * 1000:>16.2f} {decode_time * 1000:>11.2f}"
+            )
+
+        assert msgpack.unpackb(bodies["msgpack"]) == json.loads(bodies["json"])
+        assert len(bodies["msgpack"]) < len(bodies["json"])
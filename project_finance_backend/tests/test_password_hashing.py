@@ -0,0 +1,40 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.password_hashing import password_pool_stats, run_in_password_pool
+from app.crud.user import get_hash_password_async, verify_password_async
+
+
+async def test_hashing_does_not_block_event_loop():
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    task = asyncio.create_task(ticker())
+    # Блокирующий вызов в пуле: event loop за это время продолжает работать
+    await run_in_password_pool(time.sleep, 0.3)
+    task.cancel()
+    assert ticks >= 10
+
+
+async def test_hash_and_verify_round_trip():
+    hashed = await get_hash_password_async("secret")
+    assert await verify_password_async("secret", hashed)
+    assert not await verify_password_async("wrong", hashed)
+
+
+async def test_full_queue_returns_503(monkeypatch):
+    monkeypatch.setattr(settings, "password_hash_max_waiting", 0)
+    rejected = password_pool_stats.rejected
+    with pytest.raises(HTTPException) as exc_info:
+        await run_in_password_pool(time.sleep, 0)
+    assert exc_info.value.status_code == 503
+    assert password_pool_stats.rejected == rejected + 1
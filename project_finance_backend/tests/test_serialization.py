@@ -0,0 +1,94 @@
+import json
+from datetime import datetime
+
+import msgpack
+import pytest
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from starlette.requests import Request
+
+from app.core.serialization import MSGPACK_MEDIA_TYPE, encode_response, wants_msgpack
+from app.models.transaction import TransactionType
+from app.routers.transactions import read_transactions_adapter
+
+TRANSACTIONS = [
+    {
+        "id": 1,
+        "amount": 120.5,
+        "category_id": 3,
+        "transaction_type": TransactionType.EXPENSE,
+        "description": "Кофе",
+        "created_at": datetime(2026, 1, 2, 8, 30, 15, 123456),
+        "category": {"id": 3, "name": "Еда", "type": "expense", "color": "#fff"},
+    },
+    {
+        "id": 2,
+        "amount": 1000.0,
+        "category_id": 4,
+        "transaction_type": TransactionType.INCOME,
+        "description": None,
+        "created_at": datetime(2026, 1, 3),
+        "category": None,
+    },
+]
+
+
+def _request(accept: str | None = None) -> Request:
+    headers = [(b"accept", accept.encode())] if accept is not None else []
+    return Request({"type": "http", "method": "GET", "headers": headers})
+
+
+@pytest.mark.parametrize(
+    ("accept", "expected"),
+    [
+        (None, False),
+        ("application/json", False),
+        ("*/*", False),
+        ("application/msgpack", True),
+        ("application/x-msgpack", True),
+        ("application/msgpack, application/json", True),
+        ("application/msgpack;q=0.5, application/json", False),
+        ("application/json;q=0.5, application/msgpack", True),
+        ("application/msgpack;q=0", False),
+        ("application/msgpack;q=0.9, */*;q=0.1", True),
+    ],
+)
+def test_wants_msgpack_respects_q_values(accept, expected):
+    assert wants_msgpack(_request(accept)) is expected
+
+
+def test_json_matches_default_fastapi_encoding():
+    response = encode_response(
+        _request("application/json"),
+        Response(),
+        read_transactions_adapter,
+        TRANSACTIONS,
+    )
+    expected = jsonable_encoder(read_transactions_adapter.validate_python(TRANSACTIONS))
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == expected
+
+
+def test_msgpack_has_same_fields_as_json():
+    json_response = encode_response(
+        _request(), Response(), read_transactions_adapter, TRANSACTIONS
+    )
+    msgpack_response = encode_response(
+        _request(MSGPACK_MEDIA_TYPE),
+        Response(),
+        read_transactions_adapter,
+        TRANSACTIONS,
+    )
+    assert msgpack_response.media_type == MSGPACK_MEDIA_TYPE
+    assert msgpack.unpackb(msgpack_response.body) == json.loads(json_response.body)
+    assert msgpack_response.headers["vary"] == "Accept"
+
+
+def test_headers_set_by_endpoint_are_kept():
+    response = Response()
+    response.headers["X-Next-Cursor"] = "abc"
+    response.headers["ETag"] = 'W/"1"'
+    result = encode_response(_request(), response, read_transactions_adapter, [])
+    assert result.headers["x-next-cursor"] == "abc"
+    assert result.headers["etag"] == 'W/"1"'
+    assert result.body == b"[]"
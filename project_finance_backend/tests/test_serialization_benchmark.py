@@ -0,0 +1,120 @@
+"""
+Сериализация страницы транзакций: прежний путь FastAPI (response_model,
+jsonable_encoder, json.dumps) против encode_response с TypeAdapter
+
+Запуск: pytest -m benchmark -s tests/test_serialization_benchmark.py
+"""
+
+import json
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from starlette.requests import Request
+
+from app.core.serialization import encode_response
+from app.crud.transaction import transaction_row_to_dict
+from app.models import Categories, Transactions
+from app.models.transaction import TransactionType
+from app.routers.transactions import read_transactions_adapter
+from app.schemas.transactions import ReadTransaction
+
+pytestmark = pytest.mark.benchmark
+
+SIZES = (100, 1_000, 10_000)
+REPEATS = 5
+
+response_field = create_model_field(
+    name="Response", type_=list[ReadTransaction], mode="serialization"
+)
+
+
+def _rows(size: int) -> list[SimpleNamespace]:
+    """Строки в том виде, в каком их отдает запрос списка (Core Row)"""
+    start = datetime(2026, 1, 1, 9)
+    return [
+        SimpleNamespace(
+            id=i,
+            amount=10.0 + i % 500,
+            category_id=i % 8,
+            transaction_type=(
+                TransactionType.INCOME if i % 5 == 0 else TransactionType.EXPENSE
+            ),
+            description=f"Покупка {i}" if i % 3 else None,
+            created_at=start + timedelta(minutes=i),
+            category_name=f"Категория {i % 8}",
+            category_type="expense",
+            category_color="#3b82f6",
+            category_icon="cart",
+        )
+        for i in range(size)
+    ]
+
+
+def _orm_objects(rows: list[SimpleNamespace]) -> list[Transactions]:
+    """Те же данные ORM-объектами, как их сериализовал прежний эндпоинт"""
+    categories = {}
+    objects = []
+    for row in rows:
+        category = categories.get(row.category_id)
+        if category is None:
+            category = categories[row.category_id] = Categories(
+                id=row.category_id,
+                name=row.category_name,
+                type=row.category_type,
+                color=row.category_color,
+                icon=row.category_icon,
+            )
+        objects.append(
+            Transactions(
+                id=row.id,
+                amount=row.amount,
+                category_id=row.category_id,
+                transaction_type=row.transaction_type,
+                description=row.description,
+                created_at=row.created_at,
+                category=category,
+            )
+        )
+    return objects
+
+
+async def _old_path(objects: list[Transactions]) -> bytes:
+    content = await serialize_response(field=response_field, response_content=objects)
+    return JSONResponse(content).body
+
+
+async def _new_path(rows: list[SimpleNamespace]) -> bytes:
+    request = Request({"type": "http", "method": "GET", "headers": []})
+    items = [transaction_row_to_dict(row) for row in rows]
+    return encode_response(request, Response(), read_transactions_adapter, items).body
+
+
+async def _best_time(func, data) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        await func(data)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+async def test_encode_response_against_response_model():
+    print(
+        f"\n{'строк':>7} {'прежний, мс':>12} {'TypeAdapter, мс':>16} {'ускорение':>10}"
+    )
+    for size in SIZES:
+        rows = _rows(size)
+        objects = _orm_objects(rows)
+        # Тела ответов совпадают по содержимому
+        assert json.loads(await _old_path(objects)) == json.loads(await _new_path(rows))
+
+        old = await _best_time(_old_path, objects)
+        new = await _best_time(_new_path, rows)
+        print(f"{size:>7} {old * 1000:>12.2f} {new * 1000:>16.2f} {old / new:>9.1f}x")
+        assert new < old
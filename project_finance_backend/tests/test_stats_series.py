@@ -0,0 +1,74 @@
+from datetime import date, datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.crud.rollup import rebuild_rollups
+from app.crud.stats import STATS_SERIES_MAX_PERIODS, count_periods, get_stats_series
+from app.models import Transactions
+from app.models.transaction import TransactionType
+
+
+@pytest.mark.parametrize(
+    ("date_from", "date_to", "group_by", "expected"),
+    [
+        (date(2026, 1, 1), date(2026, 1, 1), "day", 1),
+        (date(2026, 1, 1), date(2026, 12, 31), "day", 365),
+        # 2026-01-01 - четверг, неделя начинается 2025-12-29
+        (date(2026, 1, 1), date(2026, 1, 4), "week", 1),
+        (date(2026, 1, 1), date(2026, 1, 5), "week", 2),
+        (date(2026, 1, 31), date(2026, 3, 1), "month", 3),
+        (date(2025, 12, 31), date(2026, 1, 1), "quarter", 2),
+        (date(2026, 1, 1), date(2026, 3, 31), "quarter", 1),
+        (date(2020, 6, 1), date(2026, 1, 1), "year", 7),
+    ],
+)
+def test_count_periods(date_from, date_to, group_by, expected):
+    assert count_periods(date_from, date_to, group_by) == expected
+
+
+async def test_reversed_range_is_rejected():
+    with pytest.raises(HTTPException) as exc_info:
+        await get_stats_series(None, 1, date(2026, 2, 1), date(2026, 1, 1), "day")
+    assert exc_info.value.status_code == 422
+
+
+async def test_too_many_periods_are_rejected():
+    date_from = date(2020, 1, 1)
+    date_to = date(2026, 1, 1)
+    assert count_periods(date_from, date_to, "day") > STATS_SERIES_MAX_PERIODS
+    with pytest.raises(HTTPException) as exc_info:
+        await get_stats_series(None, 1, date_from, date_to, "day")
+    assert exc_info.value.status_code == 422
+
+
+async def test_series_fills_empty_periods_with_zeros(db, user, categories):
+    income_category, food, _ = categories
+    db.add_all(
+        [
+            Transactions(
+                amount=100,
+                category_id=income_category.id,
+                transaction_type=TransactionType.INCOME,
+                user_id=user.id,
+                created_at=datetime(2026, 1, 5, 12),
+            ),
+            Transactions(
+                amount=30,
+                category_id=food.id,
+                transaction_type=TransactionType.EXPENSE,
+                user_id=user.id,
+                created_at=datetime(2026, 3, 10, 9),
+            ),
+        ]
+    )
+    await db.commit()
+    await rebuild_rollups(db, user.id)
+
+    series = await get_stats_series(
+        db, user.id, date(2026, 1, 15), date(2026, 4, 2), "month"
+    )
+    assert series["periods"] == ["2026-01-01", "2026-02-01", "2026-03-01", "2026-04-01"]
+    # Транзакция 5 января раньше date_from и в ряд не попадает
+    assert series["income"] == [0, 0, 0, 0]
+    assert series["expense"] == [0, 0, 30, 0]
@@ -0,0 +1,169 @@
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+
+from app.crud.transaction import (
+    apply_transaction_batch,
+    create_transaction,
+    delete_transaction,
+    update_transaction,
+)
+from app.crud.user import recompute_user_totals
+from app.db import AsyncSessionLocal, async_engine
+from app.models import DailyRollups, Transactions, Users
+from app.models.transaction import TransactionType
+from app.schemas.transactions import (
+    TransactionBatch,
+    TransactionCreate,
+    UpdateTransaction,
+)
+
+# Параллельных запросов заметно больше, чем соединений в пуле
+# (db_pool_size + db_max_overflow): проверяются и ожидание пула, и
+# конкуренция за строку пользователя
+CREATES = 400
+UPDATES = 100
+TYPE_CHANGES = 50
+DELETES = 100
+LATE_CREATES = 200
+
+TOTAL_COLUMNS = (
+    Users.balance,
+    Users.total_income,
+    Users.total_expense,
+    Users.income_count,
+    Users.expense_count,
+)
+
+
+async def _as_user(user_id: int, action):
+    # Отдельная сессия на запрос, как у API и бота
+    async with AsyncSessionLocal() as db:
+        current_user = await db.get(Users, user_id)
+        return await action(current_user, db)
+
+
+def _create(category, amount: float, transaction_type: TransactionType):
+    data = TransactionCreate(
+        category_id=category.id, amount=amount, transaction_type=transaction_type
+    )
+    return lambda current_user, db: create_transaction(current_user, db, data)
+
+
+def _update(transaction_id: int, **changes):
+    data = UpdateTransaction(**changes)
+    return lambda current_user, db: update_transaction(
+        current_user, db, transaction_id, data
+    )
+
+
+def _delete(transaction_id: int):
+    return lambda current_user, db: delete_transaction(current_user, db, transaction_id)
+
+
+def _batch(operations: list[dict]):
+    batch = TransactionBatch(operations=operations)
+    return lambda current_user, db: apply_transaction_batch(current_user, db, batch)
+
+
+async def _totals(user_id: int) -> tuple:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(*TOTAL_COLUMNS).where(Users.id == user_id))
+        return tuple(result.one())
+
+
+async def test_concurrent_writes_match_recomputed_totals(db, user, categories):
+    income_category, food, transport = categories
+    wait_stats = async_engine.pool.wait_stats
+    total_wait, timeouts = wait_stats.total_wait, wait_stats.timeouts
+    created = await asyncio.gather(
+        *(
+            _as_user(
+                user.id,
+                _create(
+                    income_category if i % 3 == 0 else food,
+                    100 + i,
+                    TransactionType.INCOME if i % 3 == 0 else TransactionType.EXPENSE,
+                ),
+            )
+            for i in range(CREATES)
+        )
+    )
+    ids = [t.id for t in created]
+
+    # Создание, изменение, удаление и пачка одновременно по одному пользователю
+    await asyncio.gather(
+        *(_as_user(user.id, _update(i, amount=7.5)) for i in ids[:UPDATES]),
+        *(
+            _as_user(
+                user.id,
+                _update(
+                    i,
+                    transaction_type=TransactionType.EXPENSE.value,
+                    category_id=transport.id,
+                ),
+            )
+            for i in ids[UPDATES : UPDATES + TYPE_CHANGES]
+        ),
+        *(
+            _as_user(user.id, _delete(i))
+            for i in ids[UPDATES + TYPE_CHANGES : UPDATES + TYPE_CHANGES + DELETES]
+        ),
+        *(
+            _as_user(user.id, _create(transport, 3.25, TransactionType.EXPENSE))
+            for _ in range(LATE_CREATES)
+        ),
+        _as_user(
+            user.id,
+            _batch(
+                [
+                    {"op": "update", "id": ids[-2], "data": {"amount": 1000}},
+                    {"op": "delete", "id": ids[-1]},
+                    {
+                        "op": "create",
+                        "data": {
+                            "category_id": income_category.id,
+                            "amount": 50,
+                            "transaction_type": "income",
+                        },
+                    },
+                ]
+            ),
+        ),
+    )
+
+    # Запросы действительно ждали соединений из пула, но без таймаутов
+    assert wait_stats.total_wait - total_wait > 0.1
+    assert wait_stats.timeouts == timeouts
+
+    balance, total_income, total_expense, income_count, expense_count = await _totals(
+        user.id
+    )
+    async with AsyncSessionLocal() as session:
+        await recompute_user_totals(session, user.id)
+    recomputed = await _totals(user.id)
+
+    assert recomputed[1:] == pytest.approx(
+        (total_income, total_expense, income_count, expense_count)
+    )
+    assert balance == pytest.approx(total_income - total_expense)
+    assert income_count + expense_count == CREATES - DELETES - 1 + LATE_CREATES + 1
+
+    # daily_rollups сходятся с итогами пользователя
+    result = await db.execute(
+        select(
+            func.sum(DailyRollups.income),
+            func.sum(DailyRollups.expense),
+            func.sum(DailyRollups.income_count),
+            func.sum(DailyRollups.expense_count),
+        ).where(DailyRollups.user_id == user.id)
+    )
+    assert tuple(result.one()) == pytest.approx(
+        (total_income, total_expense, income_count, expense_count)
+    )
+
+    result = await db.execute(
+        select(func.count()).where(Transactions.user_id == user.id)
+    )
+    assert result.scalar_one() == income_count + expense_count
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from app.bot.services import transcription_queue as queue_module
+from app.bot.services.transcription_queue import (
+    TranscriptionQueue,
+    TranscriptionQueueFull,
+)
+
+
+@pytest.fixture
+def transcribed(monkeypatch):
+    """Подменяет Whisper: задачи ждут gate, порядок запуска пишется в started"""
+    state = {"started": [], "gate": asyncio.Event()}
+
+    async def fake_transcribe(audio_path: str):
+        state["started"].append(audio_path)
+        await state["gate"].wait()
+        return f"text:{audio_path}"
+
+    monkeypatch.setattr(queue_module, "transcribe_audio_file", fake_transcribe)
+    return state
+
+
+@pytest.fixture
+def make_queue():
+    queues = []
+
+    def factory(workers=1, max_queue=100, max_per_user=3):
+        queue = TranscriptionQueue(workers, max_queue, max_per_user)
+        queues.append(queue)
+        return queue
+
+    yield factory
+    for queue in queues:
+        queue.stop()
+
+
+async def test_users_are_served_round_robin(transcribed, make_queue):
+    queue = make_queue(workers=1)
+    positions = [
+        queue.submit(user_id, path)[0]
+        for user_id, path in ((1, "a1"), (1, "a2"), (1, "a3"), (2, "b1"), (3, "c1"))
+    ]
+    assert positions == [1, 2, 3, 2, 3]
+
+    transcribed["gate"].set()
+    while queue.completed < 5:
+        await asyncio.sleep(0)
+    assert transcribed["started"] == ["a1", "b1", "c1", "a2", "a3"]
+
+
+async def test_position_counts_running_jobs(transcribed, make_queue):
+    queue = make_queue(workers=1)
+    _, first = queue.submit(1, "a1")
+    while queue.running < 1:
+        await asyncio.sleep(0)
+
+    position, second = queue.submit(2, "b1")
+    assert position == 2
+
+    transcribed["gate"].set()
+    assert await first == "text:a1"
+    assert await second == "text:b1"
+
+
+async def test_per_user_limit_rejects_only_that_user(transcribed, make_queue):
+    queue = make_queue(max_per_user=2)
+    queue.submit(1, "a1")
+    queue.submit(1, "a2")
+    with pytest.raises(TranscriptionQueueFull):
+        queue.submit(1, "a3")
+
+    position, _ = queue.submit(2, "b1")
+    assert position == 2
+    assert queue.rejected == 1
+    assert queue.stats()["depth"] == 3
+
+
+async def test_total_limit_rejects_everyone(transcribed, make_queue):
+    queue = make_queue(max_queue=2)
+    queue.submit(1, "a1")
+    queue.submit(2, "b1")
+    with pytest.raises(TranscriptionQueueFull):
+        queue.submit(3, "c1")
+    assert queue.rejected == 1
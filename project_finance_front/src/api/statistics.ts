@@ -44,12 +44,24 @@ export async function getStatisticsForPeriod(
 }
 
 /**
- * Получение общей статистики (вычисляется на основе транзакций)
- * Используется как fallback, если нужна общая статистика без периода
+ * Получение итоговой статистики за период (без дат - за все время)
+ * Возвращает null, если эндпоинт недоступен - тогда статистика считается на фронтенде
  */
-export async function getStatistics(): Promise<Statistics | null> {
-  // Этот эндпоинт не существует на бэкенде в текущей реализации
-  // Возвращаем null, статистика будет вычисляться на фронтенде
-  return null;
+export async function getStatistics(
+  dateFrom?: Date,
+  dateTo?: Date
+): Promise<Statistics | null> {
+  try {
+    const response = await api.get<Statistics>('/stats/summary', {
+      params: {
+        date_from: dateFrom ? dateFrom.toISOString().split('T')[0] : undefined,
+        date_to: dateTo ? dateTo.toISOString().split('T')[0] : undefined,
+      },
+    });
+    return response.data;
+  } catch (error) {
+    console.warn('Statistics summary endpoint not available:', error);
+    return null;
+  }
 }
 
@@ -61,6 +61,12 @@ export function Dashboard() {
   const loadStatistics = async () => {
     setIsStatisticsLoading(true);
     try {
+      const summary = await getStatistics();
+      if (summary) {
+        setStatistics(summary);
+        return;
+      }
+
       // Вычисляем статистику на основе транзакций
       const totalIncome = (transactions || [])
         .filter((t) => t.transaction_type === 'income')